@@ -8,3 +8,19 @@ class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
     verbose_name = 'Приложение "Api"'
+
+    def ready(self):
+        """Подключение сигналов сброса кэшей и поисковых индексов."""
+        from api import authentication  # noqa: F401
+        from api.catalog import connect_rebuild
+        from api.feed import connect_feed
+        from api.invalidation import connect_invalidation
+        from api.popularity import connect_popularity
+        from api.search import connect_search
+        from api.similar import connect_similar
+        connect_invalidation()
+        connect_rebuild()
+        connect_search()
+        connect_similar()
+        connect_feed()
+        connect_popularity()
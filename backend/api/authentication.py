@@ -0,0 +1,132 @@
+"""Аутентификация проекта foodgram."""
+import copy
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework import authentication
+from rest_framework.authtoken.models import Token
+
+from api import invalidation
+from api.cache import TTLCache
+from api.timing import timing
+from foodgram_backend.routers import set_request_user
+from users.models import User
+
+
+token_cache = TTLCache(settings.TOKEN_CACHE_MAXSIZE, settings.TOKEN_CACHE_TTL)
+
+
+def get_shared_cache():
+    """Общий для процессов кэш версий пользователей или None."""
+    if not settings.TOKEN_CACHE_ALIAS:
+        return None
+    return caches[settings.TOKEN_CACHE_ALIAS]
+
+
+def is_cache_enabled():
+    """
+    Проверка, что сброс кэша токенов сразу дойдёт до всех воркеров.
+
+    Для этого нужен общий кэш версий или слушатель шины уведомлений
+    PostgreSQL, подписанный на канал в этом процессе. Пока слушатель
+    не запущен (runserver, shell) или переподключается, токены
+    не кэшируются.
+    """
+    return get_shared_cache() is not None or invalidation.is_subscribed()
+
+
+def get_version_key(user_id):
+    """Ключ версии пользователя в общем кэше."""
+    return f'auth_user_version:{user_id}'
+
+
+def drop_local_user(user_id):
+    """Сброс закэшированных токенов пользователя в памяти процесса."""
+    token_cache.delete_if(lambda entry: entry[0].pk == user_id)
+
+
+def invalidate_user(user_id):
+    """Сброс закэшированных токенов пользователя во всех процессах."""
+    drop_local_user(user_id)
+    invalidation.notify('user', user_id)
+    shared = get_shared_cache()
+    if shared is None:
+        return
+    key = get_version_key(user_id)
+    if not shared.add(key, 1, timeout=None):
+        try:
+            shared.incr(key)
+        except ValueError:
+            shared.set(key, 1, timeout=None)
+
+
+invalidation.register('user', drop_local_user, token_cache.clear)
+
+
+def copy_credentials(user, token):
+    """Копии пользователя и токена из кэша для одного запроса."""
+    user = copy.copy(user)
+    token = copy.copy(token)
+    token.user = user
+    return user, token
+
+
+class TokenAuthentication(authentication.TokenAuthentication):
+    """
+    Аутентификация по токену с кэшированием токен -> пользователь.
+
+    Результат проверки токена хранится в ограниченном кэше процесса
+    (TOKEN_CACHE_MAXSIZE записей на TOKEN_CACHE_TTL секунд). Удаление
+    токена (в том числе выход из системы), а также любое сохранение
+    или удаление пользователя (смена пароля, деактивация) сбрасывают
+    кэш во всех воркерах: через шину уведомлений PostgreSQL или,
+    если задан TOKEN_CACHE_ALIAS, сверкой записи процесса с версией
+    пользователя в общем кэше. Без подписанного слушателя шины и
+    общего кэша токены не кэшируются. Каждый запрос получает свою
+    копию пользователя из кэша. Время проверки попадает
+    в Server-Timing, а пользователь учитывается при выборе реплики
+    для чтения.
+    """
+
+    def authenticate(self, request):
+        """Аутентификация запроса."""
+        with timing('auth'):
+            result = super().authenticate(request)
+        if result is not None:
+            set_request_user(result[0].pk)
+        return result
+
+    def authenticate_credentials(self, key):
+        """Получение пользователя по токену из кэша или базы."""
+        if not is_cache_enabled():
+            return super().authenticate_credentials(key)
+        shared = get_shared_cache()
+        entry = token_cache.get(key)
+        if entry is not None:
+            user, token, version = entry
+            if shared is None or shared.get(
+                get_version_key(user.pk), 0
+            ) == version:
+                return copy_credentials(user, token)
+        user, token = super().authenticate_credentials(key)
+        version = (
+            0 if shared is None else shared.get(get_version_key(user.pk), 0)
+        )
+        token_cache.set(key, copy_credentials(user, token) + (version,))
+        return user, token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_token(sender, instance, **kwargs):
+    """Сброс кэша при удалении токена."""
+    token_cache.delete(instance.key)
+    invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_tokens(sender, instance, **kwargs):
+    """Сброс кэша при изменении или удалении пользователя."""
+    invalidate_user(instance.pk)
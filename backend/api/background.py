@@ -0,0 +1,57 @@
+"""
+Фоновые задачи воркера.
+
+Задачи, которые не должны задерживать ответ (пересчёт похожих
+рецептов, раскладка рецептов по лентам), передаются через submit
+в очередь одного потока-демона процесса. Поток запускается при первой
+задаче и после fork, а ошибка задачи только пишется в лог и не
+останавливает поток. Задачи, не выполненные до остановки процесса,
+теряются, поэтому у каждой есть команда полной пересборки. При
+выключенной настройке BACKGROUND_TASKS (например, в тестах) задачи
+выполняются сразу в вызывающем потоке.
+"""
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger('foodgram.performance')
+
+worker = None
+
+worker_lock = threading.Lock()
+
+
+class Worker(threading.Thread):
+    """Поток, выполняющий задачи из очереди."""
+
+    def __init__(self):
+        """Поток-демон с пустой очередью."""
+        super().__init__(name='background-tasks', daemon=True)
+        self.queue = queue.Queue()
+
+    def run(self):
+        """Выполнение задач по очереди."""
+        while True:
+            function, args = self.queue.get()
+            try:
+                function(*args)
+            except Exception:
+                logger.exception('Фоновая задача %s', function.__name__)
+            finally:
+                close_old_connections()
+
+
+def submit(function, *args):
+    """Выполнение function(*args) в фоновом потоке процесса."""
+    global worker
+    if not settings.BACKGROUND_TASKS:
+        function(*args)
+        return
+    with worker_lock:
+        if worker is None or not worker.is_alive():
+            worker = Worker()
+            worker.start()
+    worker.queue.put((function, args))
@@ -0,0 +1,298 @@
+"""
+Двухуровневый кэш проекта foodgram.
+
+Первый уровень - ограниченный LRU-кэш процесса, второй - общий для
+воркеров кэш Django (CACHES['default']). Значения сгруппированы по
+пространствам имён: invalidate() меняет поколение пространства, и
+старые ключи перестают использоваться. Другие воркеры узнают о новом
+поколении не позднее чем через CACHE_LOCAL_TTL.
+
+Пересчёт горячего ключа выполняет один поток процесса и один процесс
+(блокировка через cache.add), остальные в это время получают прежнее
+значение или ждут результата. Вероятностное раннее истечение (XFetch)
+запускает пересчёт незадолго до истечения срока тем чаще, чем дольше
+вычисляется значение.
+"""
+import functools
+import hashlib
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache as shared
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from api.constants import (
+    CACHE_EARLY_EXPIRATION_BETA,
+    RESPONSE_CACHE_NAMESPACES
+)
+
+LOCK_STRIPES = 64
+
+
+class TTLCache:
+    """Потокобезопасный кэш ограниченного размера с временем жизни."""
+
+    def __init__(self, maxsize, ttl):
+        """Пустой кэш."""
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Значение по ключу или None, если его нет или оно устарело."""
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Сохранение значения с вытеснением самых старых записей."""
+        with self.lock:
+            self.data[key] = (time.monotonic() + self.ttl, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def delete(self, key):
+        """Удаление значения по ключу."""
+        with self.lock:
+            self.data.pop(key, None)
+
+    def delete_if(self, predicate):
+        """Удаление всех значений, для которых predicate истинен."""
+        with self.lock:
+            for key in [
+                key for key, (_, value) in self.data.items()
+                if predicate(value)
+            ]:
+                del self.data[key]
+
+    def clear(self):
+        """Очистка кэша."""
+        with self.lock:
+            self.data.clear()
+
+
+local = TTLCache(settings.CACHE_LOCAL_MAXSIZE, settings.CACHE_LOCAL_TTL)
+
+locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+def count(namespace, result):
+    """Учёт обращения к кэшу в метриках."""
+    from api import metrics
+
+    metrics.CACHE.labels(namespace, result).inc()
+
+
+def get_generation(namespace):
+    """Текущее поколение пространства имён."""
+    key = f'cache_gen:{namespace}'
+    generation = local.get(key)
+    if generation is None:
+        generation = shared.get(key, 0)
+        local.set(key, generation)
+    return generation
+
+
+def make_key(namespace, key):
+    """Полный ключ значения с учётом поколения пространства имён."""
+    digest = hashlib.md5(str(key).encode()).hexdigest()
+    return f'cache:{namespace}:{get_generation(namespace)}:{digest}'
+
+
+def invalidate(namespace):
+    """Сброс всех значений пространства имён во всех процессах."""
+    key = f'cache_gen:{namespace}'
+    if not shared.add(key, 1, timeout=None):
+        try:
+            shared.incr(key)
+        except ValueError:
+            shared.set(key, 1, timeout=None)
+    local.delete(key)
+    count(namespace, 'invalidate')
+
+
+def invalidate_responses():
+    """Сброс кэшей ответов вьюсетов (cache_response)."""
+    for namespace in RESPONSE_CACHE_NAMESPACES:
+        invalidate(namespace)
+
+
+def drop_local(namespace):
+    """
+    Сброс значений пространства имён в памяти процесса.
+
+    Вызывается по уведомлению об изменении в другом процессе, когда
+    общее поколение уже увеличено. Если общий кэш на деле локальный
+    для процесса (LocMemCache), поколение увеличивается и в нём.
+    """
+    if isinstance(caches['default'], LocMemCache):
+        invalidate(namespace)
+    else:
+        local.delete(f'cache_gen:{namespace}')
+
+
+def is_stale(entry, beta):
+    """Проверка истечения срока с вероятностным ранним истечением."""
+    _, expires, delta = entry
+    return time.time() - delta * beta * math.log(
+        1 - random.random()
+    ) >= expires
+
+
+def get_or_set(namespace, key, compute, timeout,
+               beta=CACHE_EARLY_EXPIRATION_BETA):
+    """Значение из кэша или результат compute(), сохранённый в кэш."""
+    full_key = make_key(namespace, key)
+    entry, result = local.get(full_key), 'local_hit'
+    if entry is None:
+        entry, result = shared.get(full_key), 'shared_hit'
+        if entry is not None:
+            local.set(full_key, entry)
+    if entry is not None and not is_stale(entry, beta):
+        count(namespace, result)
+        return entry[0]
+    return recompute(namespace, full_key, compute, timeout, entry)
+
+
+def recompute(namespace, full_key, compute, timeout, stale):
+    """Пересчёт значения одним потоком и одним процессом."""
+    lock = locks[hash(full_key) % LOCK_STRIPES]
+    if stale is not None:
+        acquired = lock.acquire(blocking=False)
+    else:
+        acquired = lock.acquire(timeout=settings.CACHE_LOCK_TIMEOUT)
+    if not acquired and stale is not None:
+        count(namespace, 'stale')
+        return stale[0]
+    try:
+        if stale is None:
+            entry = local.get(full_key) or shared.get(full_key)
+            if entry is not None:
+                local.set(full_key, entry)
+                count(namespace, 'shared_hit')
+                return entry[0]
+        lock_key = f'lock:{full_key}'
+        owner = shared.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT)
+        if not owner:
+            if stale is not None:
+                count(namespace, 'stale')
+                return stale[0]
+            entry = wait_for(full_key)
+            if entry is not None:
+                count(namespace, 'shared_hit')
+                return entry[0]
+        try:
+            start = time.perf_counter()
+            value = compute()
+            delta = time.perf_counter() - start
+            entry = (value, time.time() + timeout, delta)
+            shared.set(full_key, entry, timeout)
+            local.set(full_key, entry)
+        finally:
+            if owner:
+                shared.delete(lock_key)
+        count(namespace, 'miss' if stale is None else 'early_recompute')
+        return value
+    finally:
+        if acquired:
+            lock.release()
+
+
+def wait_for(full_key):
+    """Ожидание значения, которое вычисляет другой процесс."""
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+    delay = 0.01
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        entry = shared.get(full_key)
+        if entry is not None:
+            local.set(full_key, entry)
+            return entry
+        delay = min(delay * 2, 0.2)
+    return None
+
+
+def cached(namespace, timeout, key=None):
+    """
+    Декоратор кэширования результата функции.
+
+    key - функция от тех же аргументов, возвращающая ключ значения,
+    по умолчанию ключом служит repr аргументов.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            value_key = (
+                key(*args, **kwargs) if key else repr((args, kwargs))
+            )
+            return get_or_set(
+                namespace,
+                f'{func.__module__}.{func.__qualname__}:{value_key}',
+                lambda: func(*args, **kwargs),
+                timeout
+            )
+        return wrapper
+    return decorator
+
+
+class UncachedResponse(Exception):
+    """Ответ, который отдаётся без сохранения в кэш."""
+
+    def __init__(self, response):
+        """Исключение с ответом response."""
+        super().__init__(response.status_code)
+        self.response = response
+
+
+def cache_response(namespace, timeout, anonymous_only=False):
+    """
+    Декоратор кэширования данных ответа метода вьюсета.
+
+    Ключом служат схема, хост и полный путь запроса: данные содержат
+    абсолютные ссылки (изображения, страницы пагинатора), построенные
+    по ним. Ответ не должен зависеть от пользователя; если зависит,
+    anonymous_only=True кэширует только ответы анонимам. Кэшируются
+    только ответы 200.
+    """
+    from rest_framework.response import Response
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if anonymous_only and request.user.is_authenticated:
+                return method(self, request, *args, **kwargs)
+
+            def compute():
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    raise UncachedResponse(response)
+                return response.data
+
+            try:
+                data = get_or_set(
+                    namespace,
+                    f'{type(self).__name__}.{method.__name__}:'
+                    f'{request.scheme}://{request.get_host()}'
+                    f'{request.get_full_path()}',
+                    compute,
+                    timeout
+                )
+            except UncachedResponse as uncached:
+                return uncached.response
+            return Response(data)
+        return wrapper
+    return decorator
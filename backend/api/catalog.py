@@ -0,0 +1,223 @@
+"""
+Снимок каталога ингредиентов в файле, отображаемом в память.
+
+Снимок - компактные массивы: id (int64), позиции в порядке id
+(uint32), смещения названий и единиц измерения (uint32) и сами строки
+в UTF-8, отсортированные по названию без учёта регистра. Все воркеры
+отображают один и тот же файл через mmap и делят страницы в памяти
+без копирования в объекты Python. Файл пересобирается после изменения
+ингредиентов и подменяется атомарно через os.replace, а воркеры
+замечают новый файл по inode при следующем обращении.
+
+В заголовке хранится отпечаток базы: количество ингредиентов и
+наибольший id. Открывая файл, процесс сверяет его с базой и
+пересобирает снимок, оставшийся от другой базы или от загрузки
+в обход сигналов.
+"""
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+
+from recipes.models import Ingredient
+
+MAGIC = b'FGI2'
+
+HEADER = struct.Struct('<4sIq')
+
+SNAPSHOT_MODE = 0o644
+
+catalog = None
+
+catalog_lock = threading.Lock()
+
+
+def encode_strings(values):
+    """Строки в UTF-8 одним блоком и смещения начала каждой."""
+    offsets = array('I', [0])
+    blob = bytearray()
+    for value in values:
+        blob += value.encode()
+        offsets.append(len(blob))
+    return offsets, bytes(blob)
+
+
+def get_fingerprint():
+    """Количество ингредиентов в базе и наибольший id."""
+    result = Ingredient.objects.aggregate(count=Count('pk'), max_id=Max('pk'))
+    return result['count'], result['max_id'] or 0
+
+
+def write_snapshot(path=None):
+    """Запись снимка ингредиентов и атомарная подмена файла."""
+    path = path or settings.INGREDIENT_CATALOG_PATH
+    rows = sorted(
+        Ingredient.objects.values_list('id', 'name', 'measurement_unit'),
+        key=lambda row: (row[1].upper(), row[0])
+    )
+    ids = array('q', (row[0] for row in rows))
+    by_id = array('I', sorted(range(len(rows)), key=ids.__getitem__))
+    name_offsets, names = encode_strings(row[1] for row in rows)
+    unit_offsets, units = encode_strings(row[2] for row in rows)
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(os.path.abspath(path)),
+        prefix=f'{os.path.basename(path)}.',
+        suffix='.tmp',
+        delete=False
+    ) as file:
+        try:
+            file.write(HEADER.pack(MAGIC, len(rows), max(ids, default=0)))
+            for part in (ids, by_id, name_offsets, unit_offsets):
+                part.tofile(file)
+            file.write(names)
+            file.write(units)
+        except BaseException:
+            os.unlink(file.name)
+            raise
+    os.chmod(file.name, SNAPSHOT_MODE)
+    os.replace(file.name, path)
+    return len(rows)
+
+
+class UpperNames:
+    """Последовательность названий в верхнем регистре для bisect."""
+
+    def __init__(self, catalog):
+        """Обёртка над снимком."""
+        self.catalog = catalog
+
+    def __len__(self):
+        """Количество ингредиентов."""
+        return self.catalog.count
+
+    def __getitem__(self, position):
+        """Название в позиции position."""
+        return self.catalog.name(position).upper()
+
+
+class Catalog:
+    """Снимок каталога, отображённый в память."""
+
+    def __init__(self, path):
+        """Отображение файла снимка в память."""
+        with open(path, 'rb') as file:
+            self.inode = os.fstat(file.fileno()).st_ino
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mmap)
+        magic, self.count, max_id = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f'{path} не является снимком каталога')
+        self.fingerprint = (self.count, max_id)
+        offset = HEADER.size
+        parts = []
+        for code, length in (
+            ('q', self.count),
+            ('I', self.count),
+            ('I', self.count + 1),
+            ('I', self.count + 1),
+        ):
+            size = array(code).itemsize * length
+            parts.append(view[offset:offset + size].cast(code))
+            offset += size
+        self.ids, self.by_id, self.name_offsets, self.unit_offsets = parts
+        self.names = view[offset:offset + self.name_offsets[-1]]
+        self.units = view[offset + self.name_offsets[-1]:]
+
+    def name(self, position):
+        """Название ингредиента в позиции position."""
+        return str(self.names[
+            self.name_offsets[position]:self.name_offsets[position + 1]
+        ], 'utf-8')
+
+    def row(self, position):
+        """Ингредиент в позиции position в формате API."""
+        return {
+            'id': self.ids[position],
+            'name': self.name(position),
+            'measurement_unit': str(self.units[
+                self.unit_offsets[position]:self.unit_offsets[position + 1]
+            ], 'utf-8'),
+        }
+
+    def get(self, ingredient_id):
+        """Ингредиент по id или None."""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self.ids[self.by_id[middle]] < ingredient_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count and self.ids[self.by_id[low]] == ingredient_id:
+            return self.row(self.by_id[low])
+        return None
+
+    def search(self, terms):
+        """
+        Ингредиенты, названия которых начинаются с каждого из terms.
+
+        Повторяет поиск SearchFilter по '^name': без учёта регистра,
+        в порядке id.
+        """
+        if not terms:
+            return [self.row(position) for position in self.by_id]
+        terms = [term.upper() for term in terms]
+        first = terms[0]
+        low = bisect_left(UpperNames(self), first)
+        positions = []
+        for position in range(low, self.count):
+            name = self.name(position).upper()
+            if not name.startswith(first):
+                break
+            if all(name.startswith(term) for term in terms[1:]):
+                positions.append(position)
+        positions.sort(key=self.ids.__getitem__)
+        return [self.row(position) for position in positions]
+
+
+def open_catalog(path):
+    """Снимок из файла path, пересобранный при расхождении с базой."""
+    try:
+        current = Catalog(path)
+    except (FileNotFoundError, ValueError, struct.error):
+        current = None
+    if current is not None and current.fingerprint == get_fingerprint():
+        return current
+    write_snapshot(path)
+    return Catalog(path)
+
+
+def get_catalog():
+    """Текущий снимок каталога, при подмене файла - новый."""
+    global catalog
+    path = settings.INGREDIENT_CATALOG_PATH
+    try:
+        inode = os.stat(path).st_ino
+    except FileNotFoundError:
+        inode = None
+    current = catalog
+    if current is not None and current.inode == inode:
+        return current
+    with catalog_lock:
+        if catalog is None or catalog.inode != inode:
+            catalog = open_catalog(path)
+        return catalog
+
+
+def rebuild(sender, **kwargs):
+    """Пересборка снимка после фиксации транзакции."""
+    transaction.on_commit(write_snapshot)
+
+
+def connect_rebuild():
+    """Пересборка снимка при изменении ингредиентов."""
+    post_save.connect(rebuild, sender=Ingredient, dispatch_uid='catalog')
+    post_delete.connect(rebuild, sender=Ingredient, dispatch_uid='catalog')
@@ -26,3 +26,43 @@ MIN_NUM = 1
 PAGE_SIZE = 6
 
 BAD_USERNAME = 'me'
+
+IMAGE_DIGEST_LENGTH = 32
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+LOAD_BATCH_SIZE = 1000
+
+RECIPES_CACHE_TIMEOUT = 60
+
+CATALOG_CACHE_TIMEOUT = 60 * 60
+
+CACHE_EARLY_EXPIRATION_BETA = 1.0
+
+RESPONSE_CACHE_NAMESPACES = ('recipes', 'tags')
+
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 5000
+
+SEARCH_CONFIG = 'russian'
+
+COOK_MAX_INGREDIENTS = 100
+
+SIMILAR_RECIPES_COUNT = 10
+
+MINHASH_PERMUTATIONS = 64
+
+LSH_BANDS = 16
+
+FEED_FANOUT_LIMIT = 10000
+
+FEED_BATCH_SIZE = 1000
+
+FEED_BACKFILL = 100
+
+POPULARITY_FAVORITE_WEIGHT = 1.0
+
+POPULARITY_CART_WEIGHT = 0.5
+
+POPULARITY_HALF_LIFE_DAYS = 14
+
+ESTIMATED_COUNT_THRESHOLD = 100000
@@ -0,0 +1,235 @@
+"""
+Лента рецептов авторов, на которых подписан пользователь.
+
+Лента хранится строками FeedEntry на каждого подписчика: после
+создания рецепта они вставляются пачками по FEED_BATCH_SIZE для всех
+подписчиков автора (fan-out on write), а при подписке в ленту
+добавляются последние FEED_BACKFILL рецептов автора. Авторы, у которых
+больше FEED_FANOUT_LIMIT подписчиков, в ленты не раскладываются: их
+рецепты читаются при запросе ленты и сливаются с записями ленты. Обе
+части читаются по индексу от курсора (created_at, id) без OFFSET.
+
+Раскладка и заполнение выполняются фоновым потоком воркера после
+фиксации транзакции. Подписка или отписка, после которой автор
+пересёк порог, сбрасывает кэш крупных авторов во всех воркерах, а
+автор, переставший быть крупным, заново раскладывается в ленты всех
+подписчиков.
+"""
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+from rest_framework.exceptions import NotFound
+
+from api.background import submit
+from api.cache import cached
+from api.constants import (
+    CATALOG_CACHE_TIMEOUT,
+    FEED_BACKFILL,
+    FEED_BATCH_SIZE,
+    FEED_FANOUT_LIMIT
+)
+from api.invalidation import broadcast
+from recipes.management.utils import batches
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscribe
+
+
+@cached('feed', CATALOG_CACHE_TIMEOUT)
+def get_heavy_authors():
+    """Авторы, у которых больше FEED_FANOUT_LIMIT подписчиков."""
+    return frozenset(
+        Subscribe.objects.order_by().values('author').annotate(
+            followers=Count('pk')
+        ).filter(followers__gt=FEED_FANOUT_LIMIT).values_list(
+            'author', flat=True
+        )
+    )
+
+
+def fan_out(recipe_id):
+    """Раскладка рецепта в ленты подписчиков автора."""
+    recipe = Recipe.objects.filter(pk=recipe_id).only(
+        'author_id', 'created_at'
+    ).first()
+    if recipe is None or recipe.author_id in get_heavy_authors():
+        return
+    followers = Subscribe.objects.filter(
+        author_id=recipe.author_id
+    ).order_by('pk')
+    last_id = 0
+    while True:
+        batch = list(followers.filter(pk__gt=last_id).values_list(
+            'pk', 'user_id'
+        )[:FEED_BATCH_SIZE])
+        if not batch:
+            return
+        FeedEntry.objects.bulk_create(
+            (
+                FeedEntry(
+                    user_id=user_id,
+                    recipe_id=recipe_id,
+                    created_at=recipe.created_at
+                )
+                for _, user_id in batch
+            ),
+            ignore_conflicts=True
+        )
+        last_id = batch[-1][0]
+
+
+def backfill(user_id, author_id):
+    """Последние рецепты автора в ленте нового подписчика."""
+    if author_id in get_heavy_authors():
+        return
+    FeedEntry.objects.bulk_create(
+        (
+            FeedEntry(user_id=user_id, recipe_id=pk, created_at=created_at)
+            for pk, created_at in Recipe.objects.filter(
+                author_id=author_id
+            ).order_by('-created_at', '-pk').values_list(
+                'pk', 'created_at'
+            )[:FEED_BACKFILL]
+        ),
+        ignore_conflicts=True
+    )
+
+
+def backfill_followers(author_id):
+    """Последние рецепты автора в лентах всех его подписчиков."""
+    recipes = list(Recipe.objects.filter(author_id=author_id).order_by(
+        '-created_at', '-pk'
+    ).values_list('pk', 'created_at')[:FEED_BACKFILL])
+    followers = Subscribe.objects.filter(
+        author_id=author_id
+    ).values_list('user_id', flat=True)
+    for batch in batches(followers.iterator(), FEED_BATCH_SIZE):
+        FeedEntry.objects.bulk_create(
+            (
+                FeedEntry(user_id=user_id, recipe_id=pk, created_at=created)
+                for user_id in batch
+                for pk, created in recipes
+            ),
+            ignore_conflicts=True
+        )
+
+
+def update_heavy(author_id):
+    """
+    Сброс кэша крупных авторов, если author_id пересёк порог.
+
+    Пока автор был крупным, его рецепты не раскладывались, поэтому
+    после возврата под порог они добавляются в ленты подписчиков.
+    """
+    heavy = Subscribe.objects.filter(
+        author_id=author_id
+    ).count() > FEED_FANOUT_LIMIT
+    if heavy == (author_id in get_heavy_authors()):
+        return
+    broadcast('feed')
+    if not heavy:
+        backfill_followers(author_id)
+
+
+def followed(user_id, author_id):
+    """Обработка новой подписки."""
+    update_heavy(author_id)
+    backfill(user_id, author_id)
+
+
+def rebuild():
+    """Заполнение лент всех подписчиков последними рецептами авторов."""
+    FeedEntry.objects.all().delete()
+    heavy = get_heavy_authors()
+    authors = Subscribe.objects.exclude(author_id__in=heavy).order_by(
+        'author_id'
+    ).values_list('author_id', flat=True).distinct()
+    for author_id in authors.iterator():
+        backfill_followers(author_id)
+
+
+def encode_cursor(created_at, pk):
+    """Курсор страницы по последней записи."""
+    return urlsafe_b64encode(
+        f'{created_at.isoformat()}|{pk}'.encode()
+    ).decode()
+
+
+def decode_cursor(cursor):
+    """Время создания и id из курсора."""
+    try:
+        created_at, pk = urlsafe_b64decode(
+            cursor.encode()
+        ).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise NotFound('Неверный курсор.')
+
+
+def after(cursor, created_at, pk):
+    """Условие записей после курсора при сортировке по убыванию."""
+    if cursor is None:
+        return Q()
+    return Q(**{f'{created_at}__lt': cursor[0]}) | Q(
+        **{created_at: cursor[0], f'{pk}__lt': cursor[1]}
+    )
+
+
+def get_feed(user, cursor, limit):
+    """Страница ленты и курсор следующей страницы или None."""
+    cursor = decode_cursor(cursor) if cursor else None
+    rows = list(FeedEntry.objects.filter(
+        after(cursor, 'created_at', 'recipe_id'), user=user
+    ).order_by('-created_at', '-recipe_id').values_list(
+        'created_at', 'recipe_id'
+    )[:limit + 1])
+    heavy = get_heavy_authors()
+    if heavy:
+        rows += Recipe.objects.filter(
+            after(cursor, 'created_at', 'pk'),
+            author__in=Subscribe.objects.filter(
+                user=user, author_id__in=heavy
+            ).values('author_id')
+        ).order_by('-created_at', '-pk').values_list(
+            'created_at', 'pk'
+        )[:limit + 1]
+    rows = sorted(set(rows), reverse=True)[:limit + 1]
+    recipes = Recipe.objects.defer(
+        'search_vector', 'ingredient_ids'
+    ).in_bulk([pk for _, pk in rows[:limit]])
+    page = [recipes[pk] for _, pk in rows[:limit] if pk in recipes]
+    if len(rows) > limit:
+        return page, encode_cursor(*rows[limit - 1])
+    return page, None
+
+
+def recipe_created(sender, instance, created, **kwargs):
+    """Раскладка нового рецепта после фиксации транзакции."""
+    if created:
+        transaction.on_commit(lambda: submit(fan_out, instance.pk))
+
+
+def subscribed(sender, instance, created, **kwargs):
+    """Заполнение ленты после подписки."""
+    if created:
+        transaction.on_commit(
+            lambda: submit(followed, instance.user_id, instance.author_id)
+        )
+
+
+def unsubscribed(sender, instance, **kwargs):
+    """Удаление рецептов автора из ленты после отписки."""
+    FeedEntry.objects.filter(
+        user_id=instance.user_id, recipe__author_id=instance.author_id
+    ).delete()
+    transaction.on_commit(lambda: submit(update_heavy, instance.author_id))
+
+
+def connect_feed():
+    """Обновление лент при создании рецептов и подписках."""
+    post_save.connect(recipe_created, sender=Recipe, dispatch_uid='feed')
+    post_save.connect(subscribed, sender=Subscribe, dispatch_uid='feed')
+    post_delete.connect(unsubscribed, sender=Subscribe, dispatch_uid='feed')
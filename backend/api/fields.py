@@ -1,17 +1,60 @@
 """Fields.py"""
 import base64
+import hashlib
+import os
+from urllib.parse import urlparse
 
 from rest_framework import serializers
+from rest_framework.fields import SkipField
 from django.core.files.base import ContentFile
 
+from api.constants import IMAGE_DIGEST_LENGTH
+from api.timing import timing
+
 
 class Base64ImageField(serializers.ImageField):
-    """Сериализатор преобразования изображения."""
+    """
+    Сериализатор преобразования изображения.
+
+    Файл сохраняется под именем, равным дайджесту base64-строки
+    (хранилище может добавить к нему суффикс через '_').
+    При обновлении объекта неизменённое изображение (та же base64-строка
+    или ссылка на текущий файл) пропускается без декодирования,
+    проверки Pillow и записи в хранилище.
+    """
 
     def to_internal_value(self, data):
         """Метод преобразования изображения."""
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
-        return super().to_internal_value(data)
+            digest = hashlib.sha256(imgstr.encode()).hexdigest()[
+                :IMAGE_DIGEST_LENGTH
+            ]
+            if self.is_current_image(digest=digest):
+                raise SkipField()
+            with timing('image'):
+                data = ContentFile(
+                    base64.b64decode(imgstr), name=f'{digest}.{ext}'
+                )
+        elif isinstance(data, str) and self.is_current_image(url=data):
+            raise SkipField()
+        with timing('image'):
+            return super().to_internal_value(data)
+
+    def get_current_image(self):
+        """Получение текущего изображения обновляемого объекта."""
+        instance = getattr(self.parent, 'instance', None)
+        if instance is None or isinstance(instance, (list, tuple)):
+            return None
+        return getattr(instance, self.source, None) or None
+
+    def is_current_image(self, digest=None, url=None):
+        """Проверка совпадения с текущим изображением объекта."""
+        image = self.get_current_image()
+        if image is None:
+            return False
+        if digest is not None:
+            name = os.path.splitext(os.path.basename(image.name))[0]
+            return name.split('_')[0] == digest
+        return urlparse(url).path == urlparse(image.url).path
@@ -1,7 +1,10 @@
 """Фильтры."""
+from django.contrib.postgres.search import SearchRank
+from django.db.models import F
 from django_filters import rest_framework as filters
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import OrderingFilter, SearchFilter
 
+from api import search
 from recipes.models import Recipe
 
 
@@ -58,3 +61,57 @@ class IngredientSearchFilter(SearchFilter):
     """Поиск с начала строки."""
 
     search_param = 'name'
+
+
+class RecipeSearchFilter(SearchFilter):
+    """
+    Поиск рецептов.
+
+    В PostgreSQL - полнотекстовый поиск по названию, описанию и
+    ингредиентам с сортировкой по релевантности, если не передан
+    параметр ordering. В остальных базах - поиск по search_fields.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """Отбор рецептов по поисковому запросу."""
+        if not search.is_enabled():
+            return super().filter_queryset(request, queryset, view)
+        query = search.get_search_query(
+            request.query_params.get(self.search_param, '')
+        )
+        if query is None:
+            return queryset
+        queryset = queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        )
+        if request.query_params.get(OrderingFilter.ordering_param):
+            return queryset
+        return queryset.order_by('-rank', '-pk')
+
+
+class RecipeOrderingFilter(OrderingFilter):
+    """
+    Сортировка рецептов.
+
+    Кроме полей из ordering_fields принимает popular - сначала самые
+    популярные.
+    """
+
+    aliases = {
+        'popular': ('-popularity', '-id'),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        """Сортировка с подстановкой псевдонимов."""
+        params = request.query_params.get(self.ordering_param)
+        if not params:
+            return super().get_ordering(request, queryset, view)
+        ordering = []
+        for field in (param.strip() for param in params.split(',')):
+            if field in self.aliases:
+                ordering.extend(self.aliases[field])
+            else:
+                ordering.extend(self.remove_invalid_fields(
+                    queryset, [field], view, request
+                ))
+        return ordering or self.get_default_ordering(view)
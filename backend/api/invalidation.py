@@ -0,0 +1,219 @@
+"""
+Шина сброса кэшей между воркерами через PostgreSQL LISTEN/NOTIFY.
+
+Сохранение и удаление тегов, ингредиентов, рецептов и коротких ссылок
+после фиксации транзакции сбрасывает связанные пространства имён кэша
+и отправляет NOTIFY в канал CHANNEL. В каждом воркере поток слушателя
+держит отдельное подключение с LISTEN и, получив уведомление, сразу
+сбрасывает пространство имён в памяти своего процесса. Другие модули
+регистрируют через register свои виды уведомлений (например, сброс
+кэша токенов пользователя). После переподключения сбрасываются все
+пространства и кэши зарегистрированных видов, так как уведомления за
+время разрыва потеряны. is_subscribed истинно, только пока слушатель
+процесса подписан на канал.
+"""
+import json
+import logging
+import os
+import select
+import threading
+import time
+from uuid import uuid4
+
+import psycopg2
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models.signals import post_delete, post_save
+
+from api.cache import drop_local, invalidate
+from recipes.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    ShortLink,
+    Tag
+)
+
+logger = logging.getLogger('foodgram.performance')
+
+CHANNEL = 'foodgram_invalidate'
+
+POLL_TIMEOUT = 5
+
+RECONNECT_DELAY = 1
+
+INVALIDATE_ON = {
+    'recipes': (Recipe, RecipeIngredient, RecipeTag, Tag, Ingredient),
+    'tags': (Tag,),
+    'short_links': (ShortLink,),
+}
+
+listener = None
+
+listener_lock = threading.Lock()
+
+process_id = uuid4().hex
+
+subscribed = threading.Event()
+
+
+def reset_after_fork():
+    """
+    Новый id процесса после fork, чтобы воркеры не совпадали.
+
+    Поток слушателя в дочерний процесс не переходит, поэтому подписка
+    тоже сбрасывается.
+    """
+    global process_id
+    process_id = uuid4().hex
+    subscribed.clear()
+
+
+os.register_at_fork(after_in_child=reset_after_fork)
+
+
+def is_enabled():
+    """Проверка, что шина включена и база - PostgreSQL."""
+    return (
+        settings.CACHE_INVALIDATION_BUS
+        and connection.vendor == 'postgresql'
+    )
+
+
+def is_subscribed():
+    """Проверка, что слушатель процесса подписан на канал."""
+    return subscribed.is_set()
+
+
+def notify(kind, value):
+    """
+    Уведомление остальных воркеров.
+
+    NOTIFY внутри транзакции доставляется только после её фиксации.
+    """
+    if not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_notify(%s, %s)',
+            [CHANNEL, json.dumps({kind: value, 'sender': process_id})]
+        )
+
+
+def broadcast(namespace):
+    """Сброс пространства имён и уведомление остальных воркеров."""
+    invalidate(namespace)
+    notify('namespace', namespace)
+
+
+def publish(namespace):
+    """Сброс пространства имён после фиксации текущей транзакции."""
+    transaction.on_commit(lambda: broadcast(namespace))
+
+
+def handle(payload):
+    """Обработка уведомления другого процесса."""
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        logger.warning('Некорректное уведомление %s: %r', CHANNEL, payload)
+        return
+    if message.pop('sender', None) == process_id:
+        return
+    for kind, value in message.items():
+        if kind in receivers:
+            receivers[kind][0](value)
+
+
+def drop_all_local():
+    """Сброс всех пространств имён в памяти процесса."""
+    for namespace in INVALIDATE_ON:
+        drop_local(namespace)
+
+
+receivers = {'namespace': (drop_local, drop_all_local)}
+
+
+def register(kind, receive, reset):
+    """
+    Регистрация вида уведомлений kind.
+
+    receive вызывается со значением уведомления, reset - после
+    переподключения слушателя.
+    """
+    receivers[kind] = (receive, reset)
+
+
+class Listener(threading.Thread):
+    """Поток, слушающий канал CHANNEL на отдельном подключении."""
+
+    def __init__(self):
+        """Поток-демон слушателя."""
+        super().__init__(name='cache-invalidation', daemon=True)
+
+    def run(self):
+        """Прослушивание с переподключением при ошибках."""
+        while True:
+            try:
+                self.listen()
+            except Exception:
+                logger.exception('Шина сброса кэша: переподключение')
+                time.sleep(RECONNECT_DELAY)
+
+    def listen(self):
+        """
+        Подключение, LISTEN и обработка уведомлений.
+
+        Кэши зарегистрированных видов сбрасываются после LISTEN, а
+        подписка снимается при любом выходе, в том числе по ошибке
+        обработчика уведомления.
+        """
+        params = connections['default'].get_connection_params()
+        listen_connection = psycopg2.connect(**params)
+        try:
+            listen_connection.autocommit = True
+            with listen_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN {CHANNEL}')
+            for _, reset in receivers.values():
+                reset()
+            subscribed.set()
+            while True:
+                if not select.select(
+                    [listen_connection], [], [], POLL_TIMEOUT
+                )[0]:
+                    continue
+                listen_connection.poll()
+                while listen_connection.notifies:
+                    handle(listen_connection.notifies.pop(0).payload)
+        finally:
+            subscribed.clear()
+            listen_connection.close()
+
+
+def start_listener():
+    """Запуск слушателя в текущем процессе, если он ещё не запущен."""
+    global listener
+    if not is_enabled():
+        return
+    with listener_lock:
+        if listener is not None and listener.is_alive():
+            return
+        listener = Listener()
+        listener.start()
+
+
+def connect_invalidation():
+    """Сброс пространств имён при изменении связанных моделей."""
+    for namespace, models in INVALIDATE_ON.items():
+        def receiver(sender, namespace=namespace, **kwargs):
+            publish(namespace)
+
+        for model in models:
+            for signal in (post_save, post_delete):
+                signal.connect(
+                    receiver,
+                    sender=model,
+                    weak=False,
+                    dispatch_uid=f'cache:{namespace}:{model.__name__}'
+                )
@@ -0,0 +1,186 @@
+"""Management команда замера производительности эндпоинтов."""
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment
+)
+from rest_framework.authtoken.models import Token
+
+from api import invalidation
+from api.cache import invalidate_responses
+from recipes.models import Recipe
+from users.models import User
+
+BASELINE = f'{settings.BASE_DIR}/benchmarks/baseline.json'
+
+RUNS = 20
+
+LATENCY_TOLERANCE = 1.5
+
+LISTENER_TIMEOUT = 5
+
+SCENARIOS = (
+    ('recipes-list', None, '/api/recipes/'),
+    ('recipes-list-auth', 'favorites', '/api/recipes/'),
+    ('recipes-detail', 'favorites', '/api/recipes/{recipe}/'),
+    (
+        'users-subscriptions', 'subscribe_user',
+        '/api/users/subscriptions/?recipes_limit=3'
+    ),
+    (
+        'download-shopping-cart', 'shoppingcarts',
+        '/api/recipes/download_shopping_cart/'
+    ),
+    ('ingredients-list', None, '/api/ingredients/'),
+    ('ingredients-search', None, '/api/ingredients/?name=са'),
+)
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    values = sorted(values)
+    return values[max(0, round(percent / 100 * len(values)) - 1)]
+
+
+class Command(BaseCommand):
+    """
+    Класс замера эндпоинтов на сгенерированных данных.
+
+    Для каждого сценария считает количество SQL-запросов, размер ответа
+    и p50/p95 времени ответа и сравнивает их с базовым файлом.
+    Превышение бюджета завершает команду с ошибкой. Кэши ответов
+    сбрасываются перед каждым запросом, поэтому замер отражает
+    вычисление ответа, а не чтение из кэша. Как и в воркере gunicorn,
+    запускается слушатель шины сброса кэшей, без которого токены
+    не кэшируются.
+    """
+
+    help = 'Замер latency, SQL-запросов и размера ответа эндпоинтов.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--runs', type=int, default=RUNS)
+        parser.add_argument('--baseline', default=BASELINE)
+        parser.add_argument(
+            '--tolerance', type=float, default=LATENCY_TOLERANCE,
+            help='Допустимое отношение p95 к базовому значению.'
+        )
+        parser.add_argument(
+            '--update-baseline',
+            action='store_true',
+            help='Записать результаты замера в базовый файл.'
+        )
+
+    def handle(self, *args, **options):
+        """handle."""
+        if options['runs'] < 1:
+            raise CommandError('--runs должен быть больше нуля')
+        recipe = Recipe.objects.order_by('id').first()
+        if recipe is None:
+            raise CommandError(
+                'Нет рецептов: сначала выполните manage.py generatedata'
+            )
+        invalidation.start_listener()
+        if invalidation.is_enabled():
+            invalidation.subscribed.wait(LISTENER_TIMEOUT)
+        setup_test_environment()
+        try:
+            results = {
+                name: self.measure(
+                    self.get_client(related),
+                    url.format(recipe=recipe.id),
+                    options['runs']
+                )
+                for name, related, url in SCENARIOS
+            }
+        finally:
+            teardown_test_environment()
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<24} p50 {result["p50_ms"]:>8.2f} мс  '
+                f'p95 {result["p95_ms"]:>8.2f} мс  '
+                f'SQL {result["queries"]:>4}  {result["bytes"]:>8} байт'
+            )
+        if options['update_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                json.dump(results, file, indent=4, sort_keys=True)
+                file.write('\n')
+            self.stdout.write(self.style.SUCCESS('Базовый файл обновлён'))
+            return
+        self.compare(results, options['baseline'], options['tolerance'])
+
+    def get_client(self, related):
+        """Клиент анонима или пользователя с наибольшим числом связей."""
+        client = Client()
+        if related is None:
+            return client
+        user = User.objects.annotate(
+            related_count=Count(related)
+        ).order_by('-related_count', 'id').first()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.defaults['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+        return client
+
+    def measure(self, client, url, runs):
+        """Замер одного сценария."""
+        reset_queries()
+        invalidate_responses()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f'{url}: статус {response.status_code}')
+        timings = []
+        for _ in range(runs):
+            invalidate_responses()
+            start = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        return {
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'queries': len(queries),
+            'bytes': len(response.content),
+        }
+
+    def compare(self, results, path, tolerance):
+        """Сравнение с базовым файлом."""
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                baseline = json.load(file)
+        except FileNotFoundError:
+            raise CommandError(
+                f'Нет базового файла {path}, запустите с --update-baseline'
+            )
+        errors = []
+        for name, result in results.items():
+            budget = baseline.get(name)
+            if budget is None:
+                errors.append(f'{name}: нет в базовом файле')
+                continue
+            if result['queries'] > budget['queries']:
+                errors.append(
+                    f'{name}: SQL {result["queries"]} > {budget["queries"]}'
+                )
+            if result['p95_ms'] > budget['p95_ms'] * tolerance:
+                errors.append(
+                    f'{name}: p95 {result["p95_ms"]} мс > '
+                    f'{budget["p95_ms"]} мс x {tolerance}'
+                )
+            if result['bytes'] > budget['bytes']:
+                errors.append(
+                    f'{name}: {result["bytes"]} байт > {budget["bytes"]}'
+                )
+        if errors:
+            raise CommandError(
+                'Превышен бюджет производительности:\n' + '\n'.join(errors)
+            )
+        self.stdout.write(self.style.SUCCESS('Бюджет не превышен'))
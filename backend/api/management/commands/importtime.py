@@ -0,0 +1,122 @@
+"""Management команда замера времени импорта модулей при запуске."""
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+TOP = 20
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+TARGETS = {
+    'wsgi': ('-c', 'import foodgram_backend.wsgi'),
+    'check': ('manage.py', 'check'),
+    'migrate': ('manage.py', 'migrate', '--check'),
+}
+
+
+def parse(stderr):
+    """Строки -X importtime: модуль, собственное и полное время в мкс."""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            modules.append((
+                match.group(4),
+                int(match.group(1)),
+                int(match.group(2)),
+                len(match.group(3)) // 2,
+            ))
+    return modules
+
+
+class Command(BaseCommand):
+    """
+    Класс замера времени импорта.
+
+    Запускает в отдельном процессе python -X importtime для импорта
+    wsgi-приложения, manage.py check и manage.py migrate --check и
+    выводит общее время процесса, собственное время импорта по
+    пакетам верхнего уровня, самые дорогие модули и модули проекта
+    с полным временем вместе с тем, что они импортируют.
+    """
+
+    help = 'Замер времени импорта модулей при запуске процесса.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            'targets', nargs='*', default=['wsgi', 'check'],
+            help=f'Что запускать: {", ".join(TARGETS)}.'
+        )
+        parser.add_argument('--top', type=int, default=TOP)
+
+    def handle(self, *args, **options):
+        """handle."""
+        unknown = set(options['targets']) - set(TARGETS)
+        if unknown:
+            raise CommandError(f'Неизвестные цели: {", ".join(unknown)}')
+        for target in options['targets']:
+            self.report(target, options['top'])
+
+    def run(self, target):
+        """Запуск цели с -X importtime, возвращает время и вывод."""
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', *TARGETS[target]],
+            cwd=settings.BASE_DIR,
+            env=os.environ.copy(),
+            capture_output=True,
+            text=True
+        )
+        elapsed = time.perf_counter() - start
+        if result.returncode:
+            raise CommandError(
+                f'{target}: код {result.returncode}\n{result.stderr[-2000:]}'
+            )
+        return elapsed, parse(result.stderr)
+
+    def report(self, target, top):
+        """Вывод результатов одной цели."""
+        elapsed, modules = self.run(target)
+        total = sum(self_time for _, self_time, _, _ in modules)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{target}: процесс {elapsed * 1000:.0f} мс, импорт '
+            f'{total / 1000:.0f} мс, модулей {len(modules)}'
+        ))
+        packages = defaultdict(int)
+        for name, self_time, _, _ in modules:
+            packages[name.split('.')[0]] += self_time
+        self.table(
+            'Пакеты (собственное время)',
+            sorted(packages.items(), key=lambda item: -item[1])[:top]
+        )
+        self.table(
+            'Модули (собственное время)',
+            sorted(
+                ((name, self_time) for name, self_time, _, _ in modules),
+                key=lambda item: -item[1]
+            )[:top]
+        )
+        self.table(
+            'Модули проекта (полное время)',
+            sorted(
+                (
+                    (f'{"  " * depth}{name}', cumulative)
+                    for name, _, cumulative, depth in modules
+                    if name.split('.')[0] in settings.PROJECT_APPS
+                ),
+                key=lambda item: -item[1]
+            )[:top]
+        )
+
+    def table(self, title, rows):
+        """Вывод таблицы модуль - время."""
+        self.stdout.write(f'  {title}:')
+        for name, microseconds in rows:
+            self.stdout.write(f'    {microseconds / 1000:>8.1f} мс  {name}')
@@ -0,0 +1,90 @@
+"""Management команда сборки снимка каталога ингредиентов."""
+import os
+import pickle
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.catalog import Catalog, write_snapshot
+from api.serializers import IngredientsSerializer
+from recipes.models import Ingredient
+
+WORKERS = 4
+
+
+def measure(build):
+    """Результат build() и память Python, которую он удерживает."""
+    tracemalloc.start()
+    try:
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+class Command(BaseCommand):
+    """
+    Класс сборки снимка каталога ингредиентов.
+
+    С --compare сравнивает память снимка с кэшем объектов Python,
+    который каждый воркер держал бы у себя.
+    """
+
+    help = 'Сборка снимка каталога ингредиентов для воркеров.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Сравнить память снимка и кэша объектов в воркерах.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=WORKERS,
+            help='Количество воркеров для сравнения.'
+        )
+
+    def handle(self, *args, **options):
+        """handle."""
+        path = settings.INGREDIENT_CATALOG_PATH
+        start = time.perf_counter()
+        count = write_snapshot(path)
+        self.stdout.write(
+            f'{path}: {count} ингредиентов, {os.path.getsize(path)} байт, '
+            f'{time.perf_counter() - start:.3f} с'
+        )
+        if options['compare']:
+            self.compare(path, options['workers'])
+
+    def compare(self, path, workers):
+        """Сравнение памяти снимка и кэша объектов Python."""
+        objects, objects_size = measure(
+            lambda: IngredientsSerializer(
+                Ingredient.objects.order_by('id'), many=True
+            ).data
+        )
+        pickled = len(pickle.dumps(objects))
+        _, catalog_size = measure(lambda: Catalog(path))
+        file_size = os.path.getsize(path)
+        rows = [
+            ('Объекты Python в каждом воркере', objects_size,
+             objects_size * workers),
+            ('Pickle в LocMemCache каждого воркера', pickled,
+             pickled * workers),
+            ('Снимок: файл в общем page cache', file_size, file_size),
+            ('Снимок: объекты Python в каждом воркере', catalog_size,
+             catalog_size * workers),
+        ]
+        self.stdout.write(
+            f'{"":<42} {"на воркер":>12} {f"{workers} воркеров":>14}'
+        )
+        for name, size, total in rows:
+            self.stdout.write(f'{name:<42} {size:>12} {total:>14}')
+        ratio = rows[0][2] / (rows[2][2] + rows[3][2])
+        self.stdout.write(
+            f'Снимок занимает в {ratio:.1f} раза меньше памяти, '
+            'чем объекты Python'
+        )
@@ -0,0 +1,28 @@
+"""Management команда заполнения лент подписок."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.feed import rebuild
+from recipes.models import FeedEntry
+
+
+class Command(BaseCommand):
+    """
+    Класс заполнения лент подписок.
+
+    Нужна после загрузки подписок и рецептов в обход моделей, например
+    после generatedata; дальше ленты обновляются при создании рецептов
+    и подписках.
+    """
+
+    help = 'Заполнение лент подписок последними рецептами авторов.'
+
+    def handle(self, *args, **options):
+        """handle."""
+        start = time.perf_counter()
+        rebuild()
+        self.stdout.write(
+            f'Записей в лентах: {FeedEntry.objects.count()}, '
+            f'{time.perf_counter() - start:.1f} с'
+        )
@@ -0,0 +1,27 @@
+"""Management команда пересчёта популярности рецептов."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.popularity import refresh
+
+
+class Command(BaseCommand):
+    """
+    Класс пересчёта популярности рецептов.
+
+    Популярность меняется на месте при каждом добавлении в избранное и
+    список покупок; команда пересчитывает её заново, например по
+    расписанию или после загрузки данных в обход моделей.
+    """
+
+    help = 'Пересчёт популярности рецептов.'
+
+    def handle(self, *args, **options):
+        """handle."""
+        start = time.perf_counter()
+        count = refresh()
+        self.stdout.write(
+            f'Рецептов с популярностью: {count}, '
+            f'{time.perf_counter() - start:.1f} с'
+        )
@@ -0,0 +1,38 @@
+"""Management команда сборки индекса похожих рецептов."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.constants import LOAD_BATCH_SIZE
+from api.similar import rebuild
+from recipes.models import Recipe, SimilarRecipe
+
+
+class Command(BaseCommand):
+    """
+    Класс полной пересборки индекса похожих рецептов.
+
+    Нужна после загрузки данных в обход моделей, например после
+    generatedata; дальше индекс обновляется при изменении рецептов.
+    """
+
+    help = 'Пересборка корзин LSH и списков похожих рецептов.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            '--batch-size', type=int, default=LOAD_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        """handle."""
+        start = time.perf_counter()
+        recipe_ids = list(
+            Recipe.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        rebuild(recipe_ids, options['batch_size'])
+        self.stdout.write(
+            f'Рецептов: {len(recipe_ids)}, '
+            f'пар похожих: {SimilarRecipe.objects.count()}, '
+            f'{time.perf_counter() - start:.1f} с'
+        )
@@ -0,0 +1,88 @@
+"""Management команда сводки по медленным SQL-запросам."""
+import glob
+import json
+import re
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+
+TOP = 20
+
+
+def normalize(sql):
+    """Приведение запроса к шаблону без длины списков IN."""
+    return IN_LIST.sub('IN (...)', ' '.join(sql.split()))
+
+
+class Command(BaseCommand):
+    """
+    Класс сводки по логу медленных запросов.
+
+    Группирует записи лога foodgram.slow_queries (включая копии,
+    оставленные ротацией) по шаблону запроса и выводит самые
+    затратные по суммарному времени.
+    """
+
+    help = 'Самые затратные медленные SQL-запросы по суммарному времени.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            '--file', default=str(settings.SLOW_QUERY_LOG_FILE)
+        )
+        parser.add_argument('--top', type=int, default=TOP)
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Выводить последний сохранённый EXPLAIN для запроса.'
+        )
+
+    def handle(self, *args, **options):
+        """handle."""
+        files = sorted(
+            path for path in glob.glob(f'{glob.escape(options["file"])}*')
+            if not path.endswith('.lock')
+        )
+        if not files:
+            raise CommandError(f'Нет файлов лога {options["file"]}')
+        groups = defaultdict(lambda: {
+            'count': 0, 'total': 0, 'max': 0, 'callers': defaultdict(int),
+            'plan': None, 'plan_time': 0,
+        })
+        for path in files:
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    group = groups[normalize(record['sql'])]
+                    group['count'] += 1
+                    group['total'] += record['duration_ms']
+                    group['max'] = max(group['max'], record['duration_ms'])
+                    group['callers'][
+                        f'{record.get("view")} {record.get("caller")}'
+                    ] += 1
+                    if (
+                        record.get('plan')
+                        and record['time'] > group['plan_time']
+                    ):
+                        group['plan'] = record['plan']
+                        group['plan_time'] = record['time']
+        top = sorted(
+            groups.items(), key=lambda item: item[1]['total'], reverse=True
+        )[:options['top']]
+        for sql, group in top:
+            caller = max(group['callers'], key=group['callers'].get)
+            self.stdout.write(
+                f'{group["total"]:>10.1f} мс всего  {group["count"]:>6} раз  '
+                f'среднее {group["total"] / group["count"]:.1f} мс  '
+                f'макс {group["max"]:.1f} мс  {caller}'
+            )
+            self.stdout.write(f'    {sql[:500]}')
+            if options['plans'] and group['plan']:
+                for row in group['plan']:
+                    self.stdout.write(f'        {row}')
@@ -0,0 +1,84 @@
+"""Management команда прогрева процесса."""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.cache import invalidate_responses
+from api.warmup import get_client, get_urls, warm_up
+
+
+class Command(BaseCommand):
+    """
+    Класс прогрева процесса.
+
+    Выполняет те же шаги, что и воркер gunicorn после запуска, и выводит
+    их время. С --compare замеряет первый запрос к каждому адресу в двух
+    новых процессах: холодном и прогретом. Перед замером кэши ответов
+    сбрасываются, поэтому в обоих случаях время включает вычисление
+    ответа, а не чтение из кэша.
+    """
+
+    help = 'Прогрев резолверов, сериализаторов, каталога и кэшей.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Сравнить время первого запроса без прогрева и с ним.'
+        )
+        parser.add_argument(
+            '--measure',
+            choices=('cold', 'warm'),
+            help=argparse.SUPPRESS
+        )
+
+    def handle(self, *args, **options):
+        """handle."""
+        if options['measure']:
+            if options['measure'] == 'warm':
+                warm_up()
+            invalidate_responses()
+            self.stdout.write(json.dumps(self.measure()))
+            return
+        timings = warm_up()
+        for name, duration in timings.items():
+            self.stdout.write(f'{name:<12} {duration * 1000:>8.1f} мс')
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрев занял {sum(timings.values()) * 1000:.1f} мс'
+        ))
+        if not options['compare']:
+            return
+        cold = self.run_fresh('cold')
+        warm = self.run_fresh('warm')
+        self.stdout.write(f'{"адрес":<24} {"холодный":>10} {"прогретый":>10}')
+        for url in cold:
+            self.stdout.write(
+                f'{url:<24} {cold[url]:>8.1f}мс {warm[url]:>8.1f}мс'
+            )
+
+    def run_fresh(self, mode):
+        """Замер в новом процессе: без прогрева (cold) или после него."""
+        output = subprocess.run(
+            [
+                sys.executable, str(settings.BASE_DIR / 'manage.py'),
+                'warmup', '--measure', mode
+            ],
+            check=True, capture_output=True, text=True
+        ).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+    def measure(self):
+        """Время первого запроса к каждому адресу прогрева в мс."""
+        client = get_client()
+        timings = {}
+        for url in get_urls():
+            start = time.perf_counter()
+            client.get(url)
+            timings[url] = (time.perf_counter() - start) * 1000
+        return timings
@@ -0,0 +1,81 @@
+"""
+Метрики Prometheus проекта foodgram.
+
+При заданной переменной окружения PROMETHEUS_MULTIPROC_DIR значения
+каждого процесса gunicorn пишутся в файлы этого каталога и суммируются
+при выдаче метрик.
+"""
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess
+)
+
+LABELS = ('view', 'action')
+
+REQUESTS = Counter(
+    'foodgram_http_requests',
+    'Количество обработанных запросов.',
+    LABELS + ('method', 'status')
+)
+
+LATENCY = Histogram(
+    'foodgram_http_request_duration_seconds',
+    'Время обработки запроса.',
+    LABELS,
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+    )
+)
+
+QUERIES = Histogram(
+    'foodgram_db_queries_per_request',
+    'Количество SQL-запросов на один запрос.',
+    LABELS,
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+
+DB_DURATION = Counter(
+    'foodgram_db_duration_seconds',
+    'Суммарное время SQL-запросов.',
+    LABELS
+)
+
+CACHE = Counter(
+    'foodgram_cache_requests',
+    'Обращения к двухуровневому кэшу по результату.',
+    ('namespace', 'result')
+)
+
+
+def get_view_labels(view_func, method):
+    """Имя view и action DRF для меток метрик."""
+    cls = getattr(view_func, 'cls', None)
+    if cls is None:
+        return getattr(view_func, '__name__', 'unknown'), ''
+    actions = getattr(view_func, 'actions', None) or {}
+    return cls.__name__, actions.get(method.lower(), '')
+
+
+def observe(labels, method, status, duration, queries):
+    """Учёт одного обработанного запроса."""
+    REQUESTS.labels(*labels, method, status).inc()
+    LATENCY.labels(*labels).observe(duration)
+    QUERIES.labels(*labels).observe(queries.count)
+    DB_DURATION.labels(*labels).inc(queries.duration)
+
+
+def render():
+    """Метрики в текстовом формате Prometheus."""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,456 @@
+"""Middleware проекта foodgram."""
+import cProfile
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import traceback
+import tracemalloc
+import uuid
+from contextlib import ExitStack, closing, contextmanager
+
+import psycopg2
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import TokenAuthentication
+from api.background import submit
+from api.constants import SLOW_QUERY_EXPLAIN_TIMEOUT_MS
+from api.timing import request_timings
+from foodgram_backend import routers
+
+logger = logging.getLogger('foodgram.performance')
+
+slow_query_logger = logging.getLogger('foodgram.slow_queries')
+
+PROFILING_MODES = {'cprofile', 'tracemalloc'}
+
+LOCKING_CLAUSE = re.compile(
+    r'\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|KEY\s+SHARE|SHARE)\b',
+    re.IGNORECASE
+)
+
+
+class QueryCounter:
+    """Обёртка выполнения SQL, считающая количество и время запросов."""
+
+    def __init__(self):
+        """Пустой счётчик."""
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Выполнение запроса с замером времени."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+@contextmanager
+def wrap_connections(wrapper):
+    """Подключение обёртки выполнения SQL ко всем подключениям."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(wrapper))
+        yield wrapper
+
+
+def count_queries():
+    """Подсчёт SQL-запросов всех подключений внутри блока."""
+    return wrap_connections(QueryCounter())
+
+
+def get_caller():
+    """
+    Ближайший к SQL-запросу кадр стека из кода проекта.
+
+    Если запрос выполнен целиком из библиотечного кода (например,
+    из ListModelMixin.list), возвращается ближайший кадр вне Django.
+    """
+    stack = traceback.StackSummary.extract(
+        traceback.walk_stack(None), lookup_lines=False
+    )
+    library_frame = None
+    for frame in stack:
+        path = os.path.relpath(frame.filename, settings.BASE_DIR)
+        if path == os.path.join('api', 'middleware.py'):
+            continue
+        if path.split(os.sep)[0] in settings.PROJECT_APPS:
+            return f'{path}:{frame.lineno} {frame.name}'
+        if library_frame is None and (
+            f'{os.sep}django{os.sep}' not in frame.filename
+        ):
+            library_frame = (
+                f'{os.path.basename(frame.filename)}:{frame.lineno} '
+                f'{frame.name}'
+            )
+    return library_frame
+
+
+class SlowQueryLogger:
+    """
+    Обёртка выполнения SQL, записывающая медленные запросы.
+
+    Запросы дольше SLOW_QUERY_THRESHOLD_MS пишутся в лог
+    foodgram.slow_queries вместе с кадром кода проекта, из которого
+    они выполнены. Для доли SLOW_QUERY_EXPLAIN_RATE медленных SELECT
+    на PostgreSQL дополнительно сохраняется EXPLAIN (ANALYZE, BUFFERS).
+    Запрос выполняется повторно, поэтому план снимается фоновым потоком
+    воркера вне ответа, на отдельном подключении в транзакции только
+    для чтения, которая затем откатывается, и с ограничением
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS. SELECT с блокировкой строк (FOR
+    UPDATE, FOR SHARE) не повторяются. План видит только
+    зафиксированные данные, а ошибка EXPLAIN пишется в запись лога.
+    """
+
+    def __init__(self, path):
+        """Обёртка для запроса по адресу path."""
+        self.path = path
+        self.view = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Выполнение запроса с записью медленных в лог."""
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration = (time.perf_counter() - start) * 1000
+        if duration >= settings.SLOW_QUERY_THRESHOLD_MS:
+            self.log(sql, params, many, context['connection'], duration)
+        return result
+
+    def log(self, sql, params, many, connection, duration):
+        """Запись медленного запроса."""
+        record = {
+            'time': time.time(),
+            'duration_ms': round(duration, 2),
+            'alias': connection.alias,
+            'path': self.path,
+            'view': self.view,
+            'caller': get_caller(),
+            'sql': sql,
+        }
+        if (
+            not many
+            and connection.vendor == 'postgresql'
+            and sql.lstrip()[:6].upper() == 'SELECT'
+            and not LOCKING_CLAUSE.search(sql)
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+        ):
+            submit(
+                log_with_plan, record, connection.get_connection_params(),
+                sql, params
+            )
+            return
+        slow_query_logger.warning(json.dumps(record, ensure_ascii=False))
+
+
+def explain(connection_params, sql, params):
+    """EXPLAIN (ANALYZE, BUFFERS) на отдельном подключении."""
+    with closing(psycopg2.connect(**connection_params)) as connection:
+        connection.set_session(readonly=True)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SET LOCAL statement_timeout = %s',
+                [SLOW_QUERY_EXPLAIN_TIMEOUT_MS]
+            )
+            cursor.execute('EXPLAIN (ANALYZE, BUFFERS) ' + sql, params)
+            plan = [row[0] for row in cursor.fetchall()]
+        connection.rollback()
+    return plan
+
+
+def log_with_plan(record, connection_params, sql, params):
+    """Запись медленного запроса вместе с его планом."""
+    try:
+        record['plan'] = explain(connection_params, sql, params)
+    except psycopg2.Error as error:
+        record['explain_error'] = str(error).strip()
+    slow_query_logger.warning(json.dumps(record, ensure_ascii=False))
+
+
+class ServerTimingMiddleware:
+    """
+    Замер времени обработки запроса.
+
+    Время SQL, view (вместе с сериализацией), рендеринга ответа
+    и участков, отмеченных timing(), отдаётся в заголовке Server-Timing
+    и пишется в лог foodgram.performance. Включается настройкой
+    SERVER_TIMING, при выключенной настройке не подключается.
+    """
+
+    def __init__(self, get_response):
+        """Инициализация middleware."""
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Обработка запроса с замером времени."""
+        timings = {}
+        token = request_timings.set(timings)
+        start = time.perf_counter()
+        try:
+            with count_queries() as queries:
+                response = self.get_response(request)
+        finally:
+            request_timings.reset(token)
+        finished = time.perf_counter()
+        view_started = timings.pop('view_started', None)
+        if view_started is not None and 'view' not in timings:
+            timings['view'] = finished - view_started
+        timings['db'] = queries.duration
+        timings['total'] = finished - start
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={duration * 1000:.1f}'
+            + (f';desc="{queries.count} queries"' if name == 'db' else '')
+            for name, duration in timings.items()
+        )
+        logger.info(
+            'method=%s path=%s status=%s db_count=%s %s',
+            request.method,
+            request.path,
+            response.status_code,
+            queries.count,
+            ' '.join(
+                f'{name}_ms={duration * 1000:.1f}'
+                for name, duration in timings.items()
+            ),
+            extra={
+                'server_timing': timings,
+                'db_count': queries.count,
+            }
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Запоминание момента начала работы view."""
+        timings = request_timings.get()
+        if timings is not None:
+            timings['view_started'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        """Замер времени view и последующего рендеринга ответа."""
+        timings = request_timings.get()
+        if timings is None or 'view_started' not in timings:
+            return response
+        view_finished = time.perf_counter()
+        timings['view'] = view_finished - timings.pop('view_started')
+
+        def rendered(response):
+            timings['render'] = time.perf_counter() - view_finished
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Сбор метрик Prometheus по view и action DRF.
+
+    Считает запросы, время ответа и SQL-запросы, например для
+    RecipesViewSet.list или RecipesViewSet.favorite. Включается
+    настройкой METRICS.
+    """
+
+    def __init__(self, get_response):
+        """Инициализация middleware."""
+        if not settings.METRICS:
+            raise MiddlewareNotUsed
+        from api import metrics
+        self.metrics = metrics
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Обработка запроса с учётом метрик."""
+        start = time.perf_counter()
+        with count_queries() as queries:
+            response = self.get_response(request)
+        self.metrics.observe(
+            getattr(request, 'metrics_labels', ('unresolved', '')),
+            request.method,
+            response.status_code,
+            time.perf_counter() - start,
+            queries
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Определение view и action запроса."""
+        request.metrics_labels = self.metrics.get_view_labels(
+            view_func, request.method
+        )
+
+
+class SlowQueryMiddleware:
+    """Запись медленных SQL-запросов. Включается настройкой SLOW_QUERY_LOG."""
+
+    def __init__(self, get_response):
+        """Инициализация middleware."""
+        if not settings.SLOW_QUERY_LOG:
+            raise MiddlewareNotUsed
+        from api.metrics import get_view_labels
+        self.get_view_labels = get_view_labels
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Обработка запроса с записью медленных SQL-запросов."""
+        request.slow_query_logger = SlowQueryLogger(request.path)
+        with wrap_connections(request.slow_query_logger):
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Запоминание view и action запроса."""
+        request.slow_query_logger.view = '.'.join(filter(None, (
+            self.get_view_labels(view_func, request.method)
+        )))
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Состояние маршрутизации чтения на реплики для запроса.
+
+    После успешного изменяющего запроса клиент на REPLICA_PIN_SECONDS
+    закрепляется за основной базой через cookie, а пользователь - ещё
+    и через общий кэш. Пользователь сессии (админ-зона) учитывается
+    перед вызовом view, пользователь токена - при аутентификации.
+    Подключается, только если заданы реплики.
+    """
+
+    def __init__(self, get_response):
+        """Инициализация middleware."""
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Обработка запроса с маршрутизацией чтения."""
+        token = routers.routing.set(routers.RoutingState(
+            request.method, request.COOKIES.get(routers.PIN_COOKIE)
+        ))
+        try:
+            response = self.get_response(request)
+        finally:
+            routers.routing.reset(token)
+        if (
+            request.method not in routers.SAFE_METHODS
+            and response.status_code < 400
+        ):
+            until = time.time() + settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                routers.PIN_COOKIE,
+                f'{until:.3f}',
+                max_age=int(settings.REPLICA_PIN_SECONDS),
+                httponly=True,
+                samesite='Lax'
+            )
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                routers.pin_user(user.pk, until)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Учёт отметки пользователя сессии."""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            routers.set_request_user(user.pk)
+
+
+class ProfilingMiddleware:
+    """
+    Профилирование отдельного запроса по требованию сотрудника.
+
+    Запрос сотрудника (is_staff) с заголовком X-Profile или параметром
+    profile со значением cprofile и/или tracemalloc выполняется под
+    cProfile и/или tracemalloc. Результат сохраняется в PROFILING_DIR,
+    а в ответ добавляются заголовки X-Profile-Id и X-Profile-Url для
+    скачивания. Включается настройкой PROFILING. Одновременно
+    профилируется не больше одного запроса, остальные выполняются
+    как обычно.
+    """
+
+    lock = threading.Lock()
+
+    def __init__(self, get_response):
+        """Инициализация middleware."""
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """Обработка запроса с профилированием по требованию."""
+        value = (
+            request.headers.get('X-Profile') or request.GET.get('profile', '')
+        )
+        modes = {mode.strip() for mode in value.split(',')} & PROFILING_MODES
+        if not modes or not self.is_staff(request):
+            return self.get_response(request)
+        if not self.lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request, modes)
+        finally:
+            self.lock.release()
+
+    @staticmethod
+    def is_staff(request):
+        """Проверка, что запрос выполнен сотрудником."""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_staff:
+            return True
+        try:
+            result = TokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return result is not None and result[0].is_staff
+
+    def profile(self, request, modes):
+        """Выполнение запроса под профилировщиком и сохранение результата."""
+        name = f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}'
+        profiler = cProfile.Profile() if 'cprofile' in modes else None
+        if 'tracemalloc' in modes:
+            tracemalloc.start()
+        if profiler:
+            profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            if profiler:
+                profiler.disable()
+            snapshot = None
+            if 'tracemalloc' in modes:
+                snapshot = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+        files = []
+        if profiler:
+            files.append(f'{name}.prof')
+            profiler.dump_stats(
+                os.path.join(settings.PROFILING_DIR, files[-1])
+            )
+        if snapshot:
+            files.append(f'{name}.snapshot')
+            snapshot.dump(os.path.join(settings.PROFILING_DIR, files[-1]))
+        self.cleanup()
+        response['X-Profile-Id'] = ', '.join(files)
+        response['X-Profile-Url'] = ', '.join(
+            f'/api/profiles/{file}/' for file in files
+        )
+        return response
+
+    @staticmethod
+    def cleanup():
+        """Удаление старых результатов сверх PROFILING_KEEP."""
+        files = sorted(
+            os.scandir(settings.PROFILING_DIR),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True
+        )
+        for entry in files[settings.PROFILING_KEEP:]:
+            os.remove(entry.path)
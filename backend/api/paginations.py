@@ -1,7 +1,58 @@
 """Пагинаторы проекта foodgram."""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
 from rest_framework.pagination import PageNumberPagination
 
-from api.constants import PAGE_SIZE
+from api.constants import ESTIMATED_COUNT_THRESHOLD, PAGE_SIZE
+
+
+def estimate_count(queryset):
+    """
+    Оценка количества строк таблицы из pg_class.reltuples или None.
+
+    Оценивается только выборка без условий: для отфильтрованной
+    оценка планировщика может сильно расходиться с результатом, и
+    возвращается None, то есть нужен точный COUNT(*). None и для
+    таблиц не больше ESTIMATED_COUNT_THRESHOLD строк.
+    """
+    if (
+        not isinstance(queryset, QuerySet)
+        or queryset.query.where
+        or queryset.query.distinct
+    ):
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+    if row is None or row[0] <= ESTIMATED_COUNT_THRESHOLD:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор списка админ-зоны с оценкой количества для больших таблиц.
+
+    Для списка без фильтров и поиска по таблице больше
+    ESTIMATED_COUNT_THRESHOLD строк вместо COUNT(*) используется
+    оценка, иначе - точное количество.
+    """
+
+    @cached_property
+    def count(self):
+        """Количество объектов, для больших таблиц без фильтров - оценка."""
+        estimate = estimate_count(self.object_list)
+        if estimate is not None:
+            return estimate
+        return super().count
 
 
 class PageLimitPaginator(PageNumberPagination):
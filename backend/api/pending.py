@@ -0,0 +1,41 @@
+"""Отложенная до фиксации транзакции обработка объектов по id."""
+import threading
+
+from django.db import transaction
+
+
+class PendingIds:
+    """
+    Набор id, которые обрабатываются один раз после фиксации.
+
+    Набор свой у каждого потока, то есть у каждого подключения к базе.
+    После фиксации транзакции handler вызывается один раз со всеми
+    накопленными id, и набор очищается. Если транзакция откатилась,
+    оставшиеся id обрабатываются вместе со следующей фиксацией в том же
+    потоке, поэтому handler должен быть идемпотентным.
+    """
+
+    def __init__(self, handler):
+        """Набор с обработчиком handler(ids)."""
+        self.handler = handler
+        self.local = threading.local()
+
+    def get(self):
+        """Набор id текущего потока."""
+        if not hasattr(self.local, 'ids'):
+            self.local.ids = set()
+        return self.local.ids
+
+    def add(self, pk):
+        """Обработка pk после фиксации текущей транзакции."""
+        self.get().add(pk)
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        """Обработка накопленных id, повторные вызовы ничего не делают."""
+        ids = self.get()
+        if not ids:
+            return
+        pending = set(ids)
+        ids.clear()
+        self.handler(pending)
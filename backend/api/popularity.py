@@ -0,0 +1,86 @@
+"""
+Популярность рецептов.
+
+Популярность - сумма весов добавлений в избранное и в списки покупок,
+каждый из которых убывает вдвое за POPULARITY_HALF_LIFE_DAYS дней.
+Вместо уменьшения всех сумм со временем вес нового добавления
+увеличивается вдвое за каждый период полураспада от EPOCH: порядок
+рецептов по такой сумме тот же, что и по убывающей, и её можно
+менять на месте одним UPDATE при добавлении и удалении. Поле
+Recipe.popularity индексировано, поэтому сортировка по популярности -
+обход индекса. Команда refreshpopularity пересчитывает суммы
+целиком.
+"""
+from datetime import datetime, timezone
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+
+from api.constants import (
+    POPULARITY_CART_WEIGHT,
+    POPULARITY_FAVORITE_WEIGHT,
+    POPULARITY_HALF_LIFE_DAYS
+)
+from recipes.management.utils import batches
+from recipes.models import Favorite, Recipe, ShoppingCart
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+HALF_LIFE_SECONDS = POPULARITY_HALF_LIFE_DAYS * 24 * 60 * 60
+
+WEIGHTS = {
+    Favorite: POPULARITY_FAVORITE_WEIGHT,
+    ShoppingCart: POPULARITY_CART_WEIGHT,
+}
+
+BATCH_SIZE = 1000
+
+
+def get_score(model, created_at):
+    """Вклад одного добавления в популярность."""
+    return WEIGHTS[model] * 2 ** (
+        (created_at - EPOCH).total_seconds() / HALF_LIFE_SECONDS
+    )
+
+
+def added(sender, instance, created, **kwargs):
+    """Учёт добавления в избранное или список покупок."""
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            popularity=F('popularity') + get_score(sender, instance.created_at)
+        )
+
+
+def removed(sender, instance, **kwargs):
+    """Учёт удаления из избранного или списка покупок."""
+    Recipe.objects.filter(pk=instance.recipe_id).update(
+        popularity=F('popularity') - get_score(sender, instance.created_at)
+    )
+
+
+@transaction.atomic
+def refresh():
+    """Пересчёт популярности всех рецептов, возвращает их количество."""
+    scores = {}
+    for model in WEIGHTS:
+        for recipe_id, created_at in model.objects.order_by().values_list(
+            'recipe_id', 'created_at'
+        ).iterator():
+            scores[recipe_id] = (
+                scores.get(recipe_id, 0) + get_score(model, created_at)
+            )
+    Recipe.objects.exclude(popularity=0).update(popularity=0)
+    for batch in batches(scores.items(), BATCH_SIZE):
+        Recipe.objects.bulk_update(
+            [Recipe(pk=pk, popularity=score) for pk, score in batch],
+            ['popularity']
+        )
+    return len(scores)
+
+
+def connect_popularity():
+    """Пересчёт популярности при изменении избранного и списков покупок."""
+    for model in WEIGHTS:
+        post_save.connect(added, sender=model, dispatch_uid='popularity')
+        post_delete.connect(removed, sender=model, dispatch_uid='popularity')
@@ -0,0 +1,186 @@
+"""
+Поиск рецептов в PostgreSQL.
+
+У каждого рецепта хранятся поисковый вектор из названия (вес A),
+названий ингредиентов (вес B) и описания (вес C) и отсортированный
+массив id ингредиентов, оба с GIN-индексами. GIN-индекс массива -
+инвертированный индекс: для каждого ингредиента сжатый
+отсортированный список рецептов, и PostgreSQL пересекает эти списки
+при поиске рецептов по набору ингредиентов. Поиск читает только
+таблицу рецептов без соединений. Оба поля пересчитываются после
+фиксации транзакции, в которой изменились рецепт, его ингредиенты или
+название ингредиента, одним UPDATE на все рецепты транзакции.
+"""
+import re
+
+from django.contrib.postgres.aggregates import ArrayAgg, StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import NotSupportedError, connection, transaction
+from django.db.models import (
+    F,
+    FloatField,
+    Func,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Value
+)
+from django.db.models.functions import Cast
+from django.db.models.signals import post_delete, post_save
+
+from api.constants import SEARCH_CONFIG
+from api.pending import PendingIds
+from recipes.models import Ingredient, Recipe, RecipeIngredient
+
+TERM = re.compile(r'\w+')
+
+
+def is_enabled():
+    """Проверка, что база - PostgreSQL."""
+    return connection.vendor == 'postgresql'
+
+
+def get_search_vector():
+    """Выражение поискового вектора рецепта."""
+    ingredients = RecipeIngredient.objects.filter(
+        recipe=OuterRef('pk')
+    ).order_by().values('recipe').annotate(
+        names=StringAgg('ingredient__name', ' ')
+    ).values('names')
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(Subquery(ingredients), weight='B', config=SEARCH_CONFIG)
+        + SearchVector('text', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def get_ingredient_ids():
+    """Выражение отсортированного массива id ингредиентов рецепта."""
+    return Subquery(
+        RecipeIngredient.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            ids=ArrayAgg('ingredient_id', ordering='ingredient_id')
+        ).values('ids')
+    )
+
+
+def update_search_index(queryset=None):
+    """Пересчёт поисковых полей рецептов queryset, по умолчанию всех."""
+    if not is_enabled():
+        return 0
+    if queryset is None:
+        queryset = Recipe.objects.all()
+    return queryset.update(
+        search_vector=get_search_vector(),
+        ingredient_ids=get_ingredient_ids()
+    )
+
+
+def get_search_query(value):
+    """
+    Запрос к поисковому вектору или None для пустой строки.
+
+    Каждое слово ищется как префикс, все слова обязательны.
+    """
+    terms = TERM.findall(value)
+    if not terms:
+        return None
+    return SearchQuery(
+        ' & '.join(f'{term}:*' for term in terms),
+        config=SEARCH_CONFIG,
+        search_type='raw'
+    )
+
+
+class MatchedCount(Func):
+    """Количество общих элементов двух массивов."""
+
+    template = 'cardinality(ARRAY(SELECT unnest(%(expressions)s)))'
+    arg_joiner = ') INTERSECT SELECT unnest('
+    output_field = IntegerField()
+
+
+def cook_with(ingredient_ids, missing=0):
+    """
+    Рецепты, которым не хватает не более missing ингредиентов.
+
+    Рецепты сортируются по доле ингредиентов из ingredient_ids, затем
+    по количеству совпавших. При missing=0 отбираются рецепты только
+    из этих ингредиентов (оператор <@), иначе - все, где есть хотя бы
+    один из них (оператор &&); оба обслуживаются GIN-индексом.
+    Работает только с PostgreSQL.
+    """
+    if not is_enabled():
+        raise NotSupportedError('Подбор рецептов требует PostgreSQL.')
+    ingredient_ids = sorted(set(ingredient_ids))
+    queryset = Recipe.objects.defer(
+        'search_vector', 'ingredient_ids'
+    ).annotate(
+        total=Func(
+            F('ingredient_ids'),
+            function='cardinality',
+            output_field=IntegerField()
+        )
+    )
+    if missing:
+        queryset = queryset.filter(
+            ingredient_ids__overlap=ingredient_ids
+        ).annotate(matched=MatchedCount(
+            F('ingredient_ids'), Value(ingredient_ids)
+        ))
+    else:
+        queryset = queryset.filter(
+            ingredient_ids__contained_by=ingredient_ids
+        ).annotate(matched=F('total'))
+    return queryset.filter(
+        matched__gt=0,
+        total__lte=F('matched') + missing
+    ).annotate(
+        coverage=Cast('matched', FloatField()) / F('total')
+    ).order_by('-coverage', '-matched', '-pk')
+
+
+def update_recipes(recipe_ids):
+    """Пересчёт поисковых полей рецептов по id."""
+    update_search_index(Recipe.objects.filter(pk__in=recipe_ids))
+
+
+pending = PendingIds(update_recipes)
+
+
+def schedule(recipe_id):
+    """Пересчёт поисковых полей рецепта, один раз на транзакцию."""
+    if is_enabled():
+        pending.add(recipe_id)
+
+
+def recipe_changed(sender, instance, **kwargs):
+    """Изменение рецепта."""
+    schedule(instance.pk)
+
+
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    """Изменение состава рецепта."""
+    schedule(instance.recipe_id)
+
+
+def ingredient_changed(sender, instance, created, **kwargs):
+    """Переименование ингредиента."""
+    if not created and is_enabled():
+        recipes = Recipe.objects.filter(ingredients=instance)
+        transaction.on_commit(lambda: update_search_index(recipes))
+
+
+def connect_search():
+    """Пересчёт поисковых векторов при сохранении."""
+    post_save.connect(recipe_changed, sender=Recipe, dispatch_uid='search')
+    for signal in (post_save, post_delete):
+        signal.connect(
+            recipe_ingredient_changed,
+            sender=RecipeIngredient,
+            dispatch_uid='search'
+        )
+    post_save.connect(
+        ingredient_changed, sender=Ingredient, dispatch_uid='search'
+    )
@@ -1,8 +1,11 @@
 """Сериализаторы приложения 'Api'."""
+from django.db import transaction
 from rest_framework import serializers
 
-from api.constants import MIN_NUM
+from api.constants import COOK_MAX_INGREDIENTS, MIN_NUM
 from api.fields import Base64ImageField
+from api.search import schedule
+from api.timing import TimedSerializerMixin
 from recipes.models import (
     Ingredient,
     Favorite,
@@ -15,7 +18,9 @@ from users.models import Subscribe, User
 from users.serializers import UsersGETSerializer
 
 
-class RecipesIngredientGETSerializer(serializers.ModelSerializer):
+class RecipesIngredientGETSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор отображения ингредиентов в рецепте."""
 
     id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
@@ -31,7 +36,9 @@ class RecipesIngredientGETSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
-class CreateRecipeIngredientSerializer(serializers.ModelSerializer):
+class CreateRecipeIngredientSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор создания связи 'Рецепт-Ингредиент'."""
 
     id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
@@ -43,7 +50,7 @@ class CreateRecipeIngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'amount')
 
 
-class IngredientsSerializer(serializers.ModelSerializer):
+class IngredientsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор модели ингредиента."""
 
     class Meta:
@@ -53,7 +60,7 @@ class IngredientsSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class TagsSerializer(serializers.ModelSerializer):
+class TagsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор модели тега."""
 
     class Meta:
@@ -63,7 +70,7 @@ class TagsSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class RecipesGETSerializer(serializers.ModelSerializer):
+class RecipesGETSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор получения рецепта."""
 
     tags = TagsSerializer(many=True, read_only=True)
@@ -81,7 +88,9 @@ class RecipesGETSerializer(serializers.ModelSerializer):
 
         model = Recipe
         read_only_fields = ('author',)
-        exclude = ['created_at']
+        exclude = (
+            'created_at', 'search_vector', 'ingredient_ids', 'popularity'
+        )
 
     def get_image_url(self, obj):
         """Получение ссылки на изображение."""
@@ -106,7 +115,9 @@ class RecipesGETSerializer(serializers.ModelSerializer):
         )
 
 
-class CreateRecipeSerializer(serializers.ModelSerializer):
+class CreateRecipeSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор создания рецепта."""
 
     ingredients = CreateRecipeIngredientSerializer(many=True)
@@ -126,7 +137,9 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
 
         model = Recipe
         read_only_fields = ('author',)
-        exclude = ['created_at']
+        exclude = (
+            'created_at', 'search_vector', 'ingredient_ids', 'popularity'
+        )
         required_fields = (
             'ingredients',
             'tags',
@@ -194,7 +207,9 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             )
             for ingredient in ingredients
         )
+        schedule(recipe.pk)
 
+    @transaction.atomic
     def create(self, validated_data):
         """Создание рецепта."""
         tags_data = validated_data.pop('tags')
@@ -204,6 +219,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         self.create_recipe_ingredient(ingredients_data, recipe)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Обновление рецепта."""
         recipe = instance
@@ -223,7 +239,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         ).data
 
 
-class ShortRecipeSerializer(serializers.ModelSerializer):
+class ShortRecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для отображения короткой информации о рецепте."""
 
     name = serializers.ReadOnlyField()
@@ -267,7 +283,9 @@ class SubscribeGETSerializer(UsersGETSerializer):
         return author.recipes.count()
 
 
-class CreateSubscribeSerializer(serializers.ModelSerializer):
+class CreateSubscribeSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     """Создание подписки."""
 
     class Meta:
@@ -307,7 +325,7 @@ class CreateSubscribeSerializer(serializers.ModelSerializer):
         ).data
 
 
-class AvatarSerializer(serializers.ModelSerializer):
+class AvatarSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор для обновления аватара."""
 
     avatar = Base64ImageField()
@@ -320,12 +338,14 @@ class AvatarSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         """Update."""
-        instance.avatar = validated_data.get('avatar',)
+        instance.avatar = validated_data.get('avatar', instance.avatar)
         instance.save()
         return instance
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
+class ShoppingCartSerializer(
+    TimedSerializerMixin, serializers.ModelSerializer
+):
     """Добавление в список покупок."""
 
     class Meta:
@@ -358,7 +378,7 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
         ).data
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class FavoriteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Добавление в избранное."""
 
     class Meta:
@@ -389,3 +409,14 @@ class FavoriteSerializer(serializers.ModelSerializer):
         return ShortRecipeSerializer(
             instance.recipe, context=self.context
         ).data
+
+
+class CookSerializer(TimedSerializerMixin, serializers.Serializer):
+    """Параметры подбора рецептов из имеющихся ингредиентов."""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=MIN_NUM),
+        allow_empty=False,
+        max_length=COOK_MAX_INGREDIENTS
+    )
+    missing = serializers.IntegerField(min_value=0, default=0)
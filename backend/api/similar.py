@@ -0,0 +1,253 @@
+"""
+Похожие рецепты через MinHash и LSH.
+
+Рецепт описывается множеством своих ингредиентов и тегов. По нему
+считается MinHash-подпись из MINHASH_PERMUTATIONS значений, которая
+делится на LSH_BANDS полос; хэш каждой полосы - корзина RecipeBucket.
+Рецепты с хотя бы одной общей корзиной - кандидаты, для них считается
+точный коэффициент Жаккара, и SIMILAR_RECIPES_COUNT лучших сохраняются
+в SimilarRecipe. Чтение похожих рецептов - выборка по индексу
+без вычислений. После фиксации транзакции, в которой изменился
+рецепт, его пересчёт передаётся фоновым задачам воркера: вне обработки
+запроса пересчитываются корзины и соседи рецепта, а сам рецепт
+добавляется в списки соседей, если он проходит в их
+SIMILAR_RECIPES_COUNT лучших. Пересчёт меняет и списки соседей,
+поэтому пересчёты во всех воркерах и полная пересборка выполняются по
+одному под общей advisory-блокировкой PostgreSQL, без гонок на
+уникальности пар и взаимных блокировок. Пересчёты, не выполненные до
+остановки процесса, восстанавливает команда similarrecipes.
+"""
+import random
+import struct
+from collections import defaultdict
+from hashlib import blake2b
+from heapq import nlargest
+
+from django.db import connection, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from api.constants import (
+    LSH_BANDS,
+    MINHASH_PERMUTATIONS,
+    SIMILAR_RECIPES_COUNT
+)
+from api.background import submit
+from api.pending import PendingIds
+from recipes.models import (
+    Recipe,
+    RecipeBucket,
+    RecipeIngredient,
+    RecipeTag,
+    SimilarRecipe
+)
+
+PRIME = (1 << 61) - 1
+
+SEED = 1
+
+ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+BAND = struct.Struct(f'<H{ROWS}Q')
+
+LOCK_ID = 4501
+
+randomizer = random.Random(SEED)
+
+PERMUTATIONS = [
+    (randomizer.randrange(1, PRIME), randomizer.randrange(PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+
+def get_features(recipe_ids):
+    """Множества ингредиентов и тегов рецептов по id."""
+    features = defaultdict(set)
+    for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by().values_list('recipe_id', 'ingredient_id'):
+        features[recipe_id].add(ingredient_id * 2)
+    for recipe_id, tag_id in RecipeTag.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by().values_list('recipe_id', 'tag_id'):
+        features[recipe_id].add(tag_id * 2 + 1)
+    return features
+
+
+def get_signature(features):
+    """MinHash-подпись множества."""
+    return [
+        min((a * feature + b) % PRIME for feature in features)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def get_buckets(features):
+    """Корзины LSH множества, по одной на полосу."""
+    if not features:
+        return []
+    signature = get_signature(features)
+    return [
+        int.from_bytes(
+            blake2b(
+                BAND.pack(band, *signature[band * ROWS:(band + 1) * ROWS]),
+                digest_size=8
+            ).digest(),
+            'little',
+            signed=True
+        )
+        for band in range(LSH_BANDS)
+    ]
+
+
+def jaccard(first, second):
+    """Коэффициент Жаккара двух множеств."""
+    common = len(first & second)
+    return common / (len(first) + len(second) - common)
+
+
+def find_similar(recipe_ids):
+    """Кандидаты в похожие со сходством для каждого из recipe_ids."""
+    buckets = defaultdict(set)
+    for recipe_id, bucket in RecipeBucket.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'bucket'):
+        buckets[bucket].add(recipe_id)
+    candidates = defaultdict(set)
+    for bucket, recipe_id in RecipeBucket.objects.filter(
+        bucket__in=list(buckets)
+    ).values_list('bucket', 'recipe_id'):
+        for owner in buckets[bucket]:
+            if owner != recipe_id:
+                candidates[owner].add(recipe_id)
+    features = get_features(
+        set(recipe_ids).union(*candidates.values())
+    )
+    return {
+        recipe_id: [
+            (jaccard(features[recipe_id], features[candidate]), candidate)
+            for candidate in candidates[recipe_id]
+        ]
+        for recipe_id in recipe_ids
+    }
+
+
+def create_similar(similar):
+    """Сохранение лучших похожих рецептов."""
+    SimilarRecipe.objects.bulk_create(
+        SimilarRecipe(recipe_id=recipe_id, similar_id=candidate, score=score)
+        for recipe_id, scores in similar.items()
+        for score, candidate in nlargest(SIMILAR_RECIPES_COUNT, scores)
+    )
+
+
+def index(recipe_ids):
+    """Сохранение корзин рецептов."""
+    features = get_features(recipe_ids)
+    RecipeBucket.objects.bulk_create(
+        RecipeBucket(recipe_id=recipe_id, bucket=bucket)
+        for recipe_id in recipe_ids
+        for bucket in get_buckets(features[recipe_id])
+    )
+
+
+def trim(recipe_ids):
+    """Удаление соседей сверх SIMILAR_RECIPES_COUNT у рецептов."""
+    seen = defaultdict(int)
+    extra = []
+    for recipe_id, pk in SimilarRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('recipe_id', '-score', 'similar_id').values_list(
+        'recipe_id', 'pk'
+    ):
+        seen[recipe_id] += 1
+        if seen[recipe_id] > SIMILAR_RECIPES_COUNT:
+            extra.append(pk)
+    SimilarRecipe.objects.filter(pk__in=extra).delete()
+
+
+def lock():
+    """Блокировка индекса похожих рецептов до конца транзакции."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [LOCK_ID])
+
+
+@transaction.atomic
+def update_similar(recipe_id):
+    """Пересчёт корзин и соседей одного рецепта."""
+    lock()
+    RecipeBucket.objects.filter(recipe_id=recipe_id).delete()
+    SimilarRecipe.objects.filter(recipe_id=recipe_id).delete()
+    SimilarRecipe.objects.filter(similar_id=recipe_id).delete()
+    if not Recipe.objects.filter(pk=recipe_id).exists():
+        return
+    index([recipe_id])
+    similar = find_similar([recipe_id])
+    create_similar(similar)
+    SimilarRecipe.objects.bulk_create(
+        SimilarRecipe(recipe_id=candidate, similar_id=recipe_id, score=score)
+        for score, candidate in similar[recipe_id]
+    )
+    trim([candidate for _, candidate in similar[recipe_id]])
+
+
+@transaction.atomic
+def rebuild(recipe_ids, batch_size):
+    """
+    Полная пересборка индекса для recipe_ids пачками.
+
+    Сначала сохраняются корзины всех рецептов, затем для каждой пачки
+    ищутся соседи.
+    """
+    lock()
+    RecipeBucket.objects.all().delete()
+    SimilarRecipe.objects.all().delete()
+    for start in range(0, len(recipe_ids), batch_size):
+        index(recipe_ids[start:start + batch_size])
+    for start in range(0, len(recipe_ids), batch_size):
+        create_similar(find_similar(recipe_ids[start:start + batch_size]))
+
+
+def recompute(recipe_ids):
+    """Пересчёт рецептов фоновыми задачами."""
+    for recipe_id in sorted(recipe_ids):
+        submit(update_similar, recipe_id)
+
+
+pending = PendingIds(recompute)
+
+
+def schedule(recipe_id):
+    """Пересчёт соседей рецепта после фиксации, один раз на транзакцию."""
+    pending.add(recipe_id)
+
+
+def recipe_changed(sender, instance, **kwargs):
+    """Изменение рецепта."""
+    schedule(instance.pk)
+
+
+def recipe_part_changed(sender, instance, **kwargs):
+    """Изменение ингредиентов или тегов рецепта."""
+    schedule(instance.recipe_id)
+
+
+def recipe_tags_changed(sender, instance, action, reverse, **kwargs):
+    """Изменение тегов рецепта через Recipe.tags."""
+    if action.startswith('post_') and not reverse:
+        schedule(instance.pk)
+
+
+def connect_similar():
+    """Пересчёт похожих рецептов при изменении рецептов."""
+    post_save.connect(recipe_changed, sender=Recipe, dispatch_uid='similar')
+    for model in (RecipeIngredient, RecipeTag):
+        for signal in (post_save, post_delete):
+            signal.connect(
+                recipe_part_changed, sender=model, dispatch_uid='similar'
+            )
+    m2m_changed.connect(
+        recipe_tags_changed,
+        sender=Recipe.tags.through,
+        dispatch_uid='similar'
+    )
@@ -0,0 +1,541 @@
+"""Тесты API."""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from api import invalidation
+from api.authentication import token_cache
+from api.cache import cache_response, invalidate
+from api.catalog import Catalog, open_catalog, write_snapshot
+from api.constants import IMAGE_DIGEST_LENGTH
+from api.feed import get_feed, get_heavy_authors
+from api.middleware import ReplicaRoutingMiddleware, SlowQueryLogger
+from api.paginations import estimate_count
+from api.search import get_search_query
+from foodgram_backend.routers import PIN_COOKIE
+from recipes.models import FeedEntry, Ingredient, Recipe, Tag
+from users.models import Subscribe, User
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+REPLICA = 'replica1'
+
+IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAA'
+    'DElEQVR4nGNgYGAAAAAEAAH2FzhVAAAAAElFTkSuQmCC'
+)
+
+OTHER_IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAIAAAABCAIAAAB7QOjdAAAA'
+    'D0lEQVR4nGP8z8DAwMAAAAYIAQHLR3Z1AAAAAElFTkSuQmCC'
+)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class AvatarTests(APITestCase):
+    """Обновление аватара."""
+
+    url = '/api/users/me/avatar/'
+
+    @classmethod
+    def tearDownClass(cls):
+        """Удаление загруженных файлов."""
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        """Пользователь с аватаром."""
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password',
+            first_name='Имя', last_name='Фамилия'
+        )
+        self.client.force_authenticate(self.user)
+        response = self.client.put(self.url, {'avatar': IMAGE}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.avatar = self.user.avatar.name
+
+    def test_same_image_keeps_avatar(self):
+        """Повторная отправка той же base64-строки сохраняет аватар."""
+        response = self.client.put(self.url, {'avatar': IMAGE}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar.name, self.avatar)
+
+    def test_current_url_keeps_avatar(self):
+        """Отправка ссылки на текущий аватар сохраняет его."""
+        response = self.client.put(
+            self.url, {'avatar': self.user.avatar.url}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar.name, self.avatar)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, BACKGROUND_TASKS=False)
+class RecipeTests(APITestCase):
+    """Создание и изменение рецептов."""
+
+    url = '/api/recipes/'
+
+    @classmethod
+    def tearDownClass(cls):
+        """Удаление загруженных файлов."""
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        """Автор, теги и ингредиенты."""
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password', first_name='Имя', last_name='Фамилия'
+        )
+        cls.tag = Tag.objects.create(name='Завтрак', slug='breakfast')
+        cls.salt = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        cls.potato = Ingredient.objects.create(
+            name='картофель', measurement_unit='г'
+        )
+
+    def setUp(self):
+        """Вход автора."""
+        self.client.force_authenticate(self.author)
+
+    def get_data(self, ingredients, **fields):
+        """Данные рецепта с ингредиентами."""
+        return {
+            'name': 'Картофельное пюре',
+            'text': 'Сварить и размять.',
+            'cooking_time': 30,
+            'image': IMAGE,
+            'tags': [self.tag.pk],
+            'ingredients': [
+                {'id': ingredient.pk, 'amount': 10}
+                for ingredient in ingredients
+            ],
+            **fields
+        }
+
+    def create_recipe(self):
+        """Создание рецепта с выполнением хуков после фиксации."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url, self.get_data([self.salt]), format='json'
+            )
+        self.assertEqual(response.status_code, 201)
+        return Recipe.objects.get(pk=response.data['id'])
+
+    def test_create_updates_search_index(self):
+        """После создания рецепта заполнены поисковые поля."""
+        recipe = self.create_recipe()
+        self.assertEqual(recipe.ingredient_ids, [self.salt.pk])
+        self.assertTrue(
+            Recipe.objects.filter(
+                pk=recipe.pk, search_vector=get_search_query('пюре')
+            ).exists()
+        )
+
+    def test_update_updates_search_index(self):
+        """После изменения рецепта поисковые поля пересчитаны."""
+        recipe = self.create_recipe()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'{self.url}{recipe.pk}/',
+                self.get_data([self.salt, self.potato], name='Пюре'),
+                format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        recipe.refresh_from_db()
+        self.assertEqual(
+            recipe.ingredient_ids, sorted([self.salt.pk, self.potato.pk])
+        )
+        self.assertTrue(
+            Recipe.objects.filter(
+                pk=recipe.pk, search_vector=get_search_query('картофель')
+            ).exists()
+        )
+
+    def update_image(self, recipe, image):
+        """Имя изображения рецепта после изменения с image."""
+        response = self.client.patch(
+            f'{self.url}{recipe.pk}/',
+            self.get_data([self.salt], image=image),
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return Recipe.objects.get(pk=recipe.pk).image.name
+
+    def test_same_image_is_skipped(self):
+        """
+        Та же base64-строка не перезаписывает изображение.
+
+        Иначе хранилище сохранило бы файл с тем же именем под новым
+        именем с суффиксом.
+        """
+        recipe = self.create_recipe()
+        self.assertEqual(self.update_image(recipe, IMAGE), recipe.image.name)
+
+    def test_current_url_is_skipped(self):
+        """Ссылка на текущее изображение не меняет его."""
+        recipe = self.create_recipe()
+        url = self.client.get(f'{self.url}{recipe.pk}/').data['image']
+        self.assertEqual(self.update_image(recipe, url), recipe.image.name)
+
+    def test_new_image_is_named_by_digest(self):
+        """Новое изображение сохраняется под именем из дайджеста."""
+        recipe = self.create_recipe()
+        name = self.update_image(recipe, OTHER_IMAGE)
+        digest = hashlib.sha256(
+            OTHER_IMAGE.split(';base64,')[1].encode()
+        ).hexdigest()[:IMAGE_DIGEST_LENGTH]
+        self.assertNotEqual(name, recipe.image.name)
+        self.assertEqual(os.path.basename(name), f'{digest}.png')
+
+
+class CachedView:
+    """Вью с кэшируемым ответом, зависящим от хоста."""
+
+    status = 200
+
+    calls = 0
+
+    @cache_response('tests', 60)
+    def list(self, request):
+        """Ответ с абсолютной ссылкой."""
+        self.calls += 1
+        return Response(
+            {'next': request.build_absolute_uri('?page=2')},
+            status=self.status
+        )
+
+
+@override_settings(ALLOWED_HOSTS=['*'])
+class CacheResponseTests(SimpleTestCase):
+    """Кэширование ответов вьюсетов."""
+
+    def setUp(self):
+        """Пустое пространство имён и вью."""
+        invalidate('tests')
+        self.view = CachedView()
+        self.factory = APIRequestFactory()
+
+    def get(self, host, secure=False):
+        """Ответ вью на запрос к хосту host."""
+        request = self.factory.get('/api/recipes/', HTTP_HOST=host,
+                                   secure=secure)
+        request.user = AnonymousUser()
+        return self.view.list(request)
+
+    def test_key_includes_host_and_scheme(self):
+        """Ссылки одного хоста и схемы не отдаются другому."""
+        self.assertEqual(
+            self.get('one.example.com').data['next'],
+            'http://one.example.com/api/recipes/?page=2'
+        )
+        self.assertEqual(
+            self.get('two.example.com').data['next'],
+            'http://two.example.com/api/recipes/?page=2'
+        )
+        self.assertEqual(
+            self.get('one.example.com', secure=True).data['next'],
+            'https://one.example.com/api/recipes/?page=2'
+        )
+        self.get('one.example.com')
+        self.assertEqual(self.view.calls, 3)
+
+    def test_only_ok_responses_are_cached(self):
+        """Ответы с кодом, отличным от 200, не кэшируются."""
+        self.view.status = 404
+        self.assertEqual(self.get('example.com').status_code, 404)
+        self.view.status = 200
+        self.assertEqual(self.get('example.com').status_code, 200)
+        self.assertEqual(self.view.calls, 2)
+
+
+class TokenCacheTests(APITestCase):
+    """Кэш токенов при подписанном слушателе шины."""
+
+    url = '/api/users/me/'
+
+    def setUp(self):
+        """Пользователь с токеном и подписанный слушатель."""
+        invalidation.subscribed.set()
+        self.addCleanup(invalidation.subscribed.clear)
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password',
+            first_name='Имя', last_name='Фамилия'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_not_cached_without_listener(self):
+        """Пока слушатель не подписан, токены не кэшируются."""
+        invalidation.subscribed.clear()
+        token_cache.clear()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertIsNone(token_cache.get(self.token.key))
+
+    def test_logout_rejects_cached_token(self):
+        """После выхода закэшированный токен не принимается."""
+        self.assertIsNotNone(token_cache.get(self.token.key))
+        response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_set_password_drops_cached_user(self):
+        """После смены пароля пользователь читается из базы заново."""
+        response = self.client.post(
+            '/api/users/set_password/',
+            {'current_password': 'password', 'new_password': 'n3w-Passw0rd'}
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        user, _, _ = token_cache.get(self.token.key)
+        self.assertTrue(user.check_password('n3w-Passw0rd'))
+
+    def test_inactive_user_rejects_cached_token(self):
+        """После деактивации закэшированный токен не принимается."""
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+@override_settings(
+    DATABASE_REPLICAS=[REPLICA],
+    DATABASE_ROUTERS=['foodgram_backend.routers.ReplicaRouter'],
+    REPLICA_PIN_SECONDS=5.5
+)
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    Маршрутизация запросов между основной базой и репликой.
+
+    Реплика - второе подключение к тестовой базе под своим alias.
+    Alias добавляется до setUpClass, поэтому в databases - '__all__':
+    набор баз раннер тестов собирает раньше.
+    """
+
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        """Подключение реплики к тестовой базе."""
+        connections.databases[REPLICA] = {
+            **connections.databases['default'],
+            'TEST': {'MIRROR': 'default'}
+        }
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        """Удаление подключения реплики."""
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+
+    def setUp(self):
+        """Middleware с view, читающим и, если нужно, пишущим в базу."""
+        self.factory = RequestFactory()
+        self.middleware = ReplicaRoutingMiddleware(self.view)
+
+    def view(self, request):
+        """Чтение, запись для изменяющих методов и повторное чтение."""
+        list(Tag.objects.all())
+        if request.method == 'POST':
+            Tag.objects.filter(pk=0).update(name='Тег')
+            list(Tag.objects.all())
+        return HttpResponse()
+
+    def run_request(self, request):
+        """Ответ и количество запросов к основной базе и к реплике."""
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections[REPLICA]) as replica:
+                response = self.middleware(request)
+        return response, len(primary), len(replica)
+
+    def test_get_reads_from_replica(self):
+        """Чтение в GET-запросе уходит на реплику."""
+        _, primary, replica = self.run_request(self.factory.get('/'))
+        self.assertEqual((primary, replica), (0, 1))
+
+    def test_write_goes_to_primary_and_pins_reads(self):
+        """Запись и последующее чтение идут в основную базу."""
+        response, primary, replica = self.run_request(
+            self.factory.post('/')
+        )
+        self.assertEqual(replica, 0)
+        self.assertEqual(primary, 3)
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+
+    def test_pinned_client_reads_from_primary(self):
+        """После записи клиент с cookie читает из основной базы."""
+        response, _, _ = self.run_request(self.factory.post('/'))
+        self.factory.cookies[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        _, primary, replica = self.run_request(self.factory.get('/'))
+        self.assertEqual((primary, replica), (1, 0))
+
+
+@override_settings(BACKGROUND_TASKS=False)
+@mock.patch('api.feed.FEED_FANOUT_LIMIT', 1)
+class FeedTests(APITestCase):
+    """Ленты подписчиков при пересечении порога крупного автора."""
+
+    def setUp(self):
+        """Автор и два читателя, кэш крупных авторов пуст."""
+        invalidate('feed')
+        self.author, self.first, self.second = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com',
+                password='password', first_name='Имя', last_name='Фамилия'
+            )
+            for name in ('author', 'first', 'second')
+        )
+
+    def subscribe(self, user):
+        """Подписка user на автора с выполнением фоновых задач."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return Subscribe.objects.create(user=user, author=self.author)
+
+    def create_recipe(self):
+        """Рецепт автора с раскладкой по лентам."""
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recipe.objects.create(
+                author=self.author, name='Рецепт', text='Текст',
+                cooking_time=10, image='recipes/images/test.png'
+            )
+
+    def test_author_becomes_heavy_after_subscription(self):
+        """Подписка сверх порога сразу сбрасывает кэш крупных авторов."""
+        self.subscribe(self.first)
+        self.assertNotIn(self.author.pk, get_heavy_authors())
+        self.subscribe(self.second)
+        self.assertIn(self.author.pk, get_heavy_authors())
+        recipe = self.create_recipe()
+        self.assertEqual(get_feed(self.first, None, 10)[0], [recipe])
+
+    def test_author_below_threshold_is_fanned_out_again(self):
+        """После отписки ниже порога рецепты автора попадают в ленты."""
+        self.subscribe(self.first)
+        subscription = self.subscribe(self.second)
+        recipe = self.create_recipe()
+        self.assertFalse(FeedEntry.objects.filter(recipe=recipe).exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            subscription.delete()
+        self.assertNotIn(self.author.pk, get_heavy_authors())
+        self.assertEqual(get_feed(self.first, None, 10)[0], [recipe])
+        self.assertEqual(get_feed(self.second, None, 10)[0], [])
+
+
+class CatalogTests(APITestCase):
+    """Снимок каталога ингредиентов."""
+
+    def setUp(self):
+        """Снимок с одним ингредиентом."""
+        self.path = settings.INGREDIENT_CATALOG_PATH
+        self.salt = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        write_snapshot(self.path)
+
+    def test_path_is_separate_under_tests(self):
+        """Тесты не перезаписывают снимок рабочей базы."""
+        self.assertNotEqual(
+            os.path.dirname(os.path.abspath(self.path)),
+            str(settings.BASE_DIR)
+        )
+
+    def test_matching_snapshot_is_reused(self):
+        """Снимок, совпадающий с базой, не пересобирается."""
+        inode = os.stat(self.path).st_ino
+        catalog = open_catalog(self.path)
+        self.assertEqual(catalog.inode, inode)
+        self.assertEqual(catalog.fingerprint, (1, self.salt.pk))
+
+    def test_stale_snapshot_is_rebuilt(self):
+        """Снимок, разошедшийся с базой, пересобирается при открытии."""
+        Ingredient.objects.bulk_create(
+            [Ingredient(name='сахар', measurement_unit='г')]
+        )
+        self.assertEqual(Catalog(self.path).count, 1)
+        catalog = open_catalog(self.path)
+        self.assertEqual(catalog.count, 2)
+        self.assertEqual(catalog.search(['сах'])[0]['name'], 'сахар')
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql', 'EXPLAIN снимается только в PostgreSQL'
+)
+@override_settings(
+    SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_RATE=1,
+    BACKGROUND_TASKS=False
+)
+class SlowQueryLogTests(APITestCase):
+    """Запись медленных запросов с планами."""
+
+    def get_records(self, queryset):
+        """Записи лога медленных запросов при выполнении queryset."""
+        with self.assertLogs('foodgram.slow_queries') as logs:
+            with connection.execute_wrapper(SlowQueryLogger('/api/tags/')):
+                list(queryset)
+        return [json.loads(record.getMessage()) for record in logs.records]
+
+    def test_select_is_explained_with_analyze(self):
+        """Для SELECT сохраняется план с фактическим временем."""
+        record, = self.get_records(Tag.objects.all())
+        self.assertEqual(record['path'], '/api/tags/')
+        self.assertIn('actual time', ' '.join(record['plan']))
+
+    def test_locking_select_is_not_repeated(self):
+        """SELECT ... FOR UPDATE не выполняется повторно."""
+        with transaction.atomic():
+            record, = self.get_records(Tag.objects.select_for_update())
+        self.assertNotIn('plan', record)
+
+
+@override_settings(SERVER_TIMING=True)
+class ServerTimingTests(APITestCase):
+    """Заголовок Server-Timing."""
+
+    def test_serialize_is_timed(self):
+        """Время сериализации ответа попадает в участок serialize."""
+        Tag.objects.create(name='Завтрак', slug='breakfast')
+        invalidate('tags')
+        response = self.client.get('/api/tags/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+
+
+class EstimateCountTests(APITestCase):
+    """Оценка количества строк для пагинации."""
+
+    def test_filtered_queryset_is_not_estimated(self):
+        """Для выборки с условиями оценка не запрашивается."""
+        with self.assertNumQueries(0):
+            self.assertIsNone(
+                estimate_count(Recipe.objects.filter(name='Пюре'))
+            )
+
+    def test_api_list_counts_exactly(self):
+        """Список API отдаёт точное количество рецептов."""
+        response = self.client.get('/api/recipes/', {'author': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
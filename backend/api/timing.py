@@ -0,0 +1,45 @@
+"""Учёт времени участков обработки запроса."""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+request_timings = ContextVar('request_timings', default=None)
+
+open_timings = ContextVar('open_timings', default=frozenset())
+
+
+@contextmanager
+def timing(name):
+    """
+    Учёт времени участка кода в Server-Timing текущего запроса.
+
+    Вложенный участок с тем же именем отдельно не учитывается: его
+    время уже входит во внешний. Вне запроса или при выключенном
+    SERVER_TIMING ничего не делает.
+    """
+    timings = request_timings.get()
+    opened = open_timings.get()
+    if timings is None or name in opened:
+        yield
+        return
+    token = open_timings.set(opened | {name})
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0) + time.perf_counter() - start
+        open_timings.reset(token)
+
+
+class TimedSerializerMixin:
+    """
+    Учёт времени сериализации в участке serialize.
+
+    Для списка учитывается каждый элемент, для вложенных сериализаторов
+    - только внешний.
+    """
+
+    def to_representation(self, instance):
+        """Представление объекта с замером времени."""
+        with timing('serialize'):
+            return super().to_representation(instance)
@@ -1,9 +1,11 @@
 """Urls.py."""
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
 from api.views import (
     IngredientsViewSet,
+    ProfileDownloadView,
     RecipesViewSet,
     TagsViewSet,
     UserViewSet
@@ -20,3 +22,8 @@ router.register('users', UserViewSet, basename='users')
 urlpatterns = [
     path('', include(router.urls)),
 ]
+
+if settings.PROFILING:
+    urlpatterns += [
+        path('profiles/<str:name>/', ProfileDownloadView.as_view()),
+    ]
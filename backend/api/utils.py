@@ -6,7 +6,9 @@ from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.response import Response
 
-from recipes.models import Recipe
+from api.cache import cached
+from api.constants import CATALOG_CACHE_TIMEOUT
+from recipes.models import Recipe, ShortLink
 
 
 def favorite_shopping_cart_recipe(model_name, serializer_name, request, pk):
@@ -50,3 +52,15 @@ def shoppings_in_file(cart):
             [f'{item} - {value}']
         )
     return response
+
+
+@cached('short_links', CATALOG_CACHE_TIMEOUT)
+def get_short_link(recipe_id):
+    """Короткая ссылка рецепта."""
+    return get_object_or_404(ShortLink, recipe_id=recipe_id).short_link
+
+
+@cached('short_links', CATALOG_CACHE_TIMEOUT)
+def get_short_link_recipe_id(short_link):
+    """Рецепт, на который ведёт короткая ссылка."""
+    return get_object_or_404(ShortLink, short_link=short_link).recipe_id
@@ -1,36 +1,63 @@
 """Views проекта foodgram."""
+import os
+import re
 
+from django.conf import settings
 from django.contrib.auth.hashers import check_password
 from django.db.models import Sum
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404, redirect
 from djoser.views import UserViewSet
-from rest_framework import filters, permissions, status, views, viewsets
+from rest_framework import permissions, status, views, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
-from api.filters import RecipeFilter, IngredientSearchFilter
+from api.cache import cache_response
+from api.catalog import get_catalog
+from api.constants import (
+    CATALOG_CACHE_TIMEOUT,
+    LOCAL_ADDRESSES,
+    RECIPES_CACHE_TIMEOUT,
+    SIMILAR_RECIPES_COUNT
+)
+from api.feed import get_feed
+from api.filters import (
+    IngredientSearchFilter,
+    RecipeFilter,
+    RecipeOrderingFilter,
+    RecipeSearchFilter
+)
 from api.paginations import PageLimitPaginator
 from api.permissions import AllowAnyExceptEndpointMe, ReadOrAuthorOnly
+from api.search import cook_with
 from api.serializers import (
     AvatarSerializer,
+    CookSerializer,
     CreateRecipeSerializer,
     FavoriteSerializer,
     IngredientsSerializer,
     RecipesGETSerializer,
     ShoppingCartSerializer,
+    ShortRecipeSerializer,
     SubscribeGETSerializer,
     CreateSubscribeSerializer,
     TagsSerializer
 )
-from api.utils import favorite_shopping_cart_recipe, shoppings_in_file
+from api.utils import (
+    favorite_shopping_cart_recipe,
+    get_short_link,
+    get_short_link_recipe_id,
+    shoppings_in_file
+)
 from recipes.models import (
     Ingredient,
     Favorite,
     Recipe,
     RecipeIngredient,
     ShoppingCart,
-    ShortLink,
+    SimilarRecipe,
     Tag
 )
 from users.models import Subscribe, User
@@ -134,7 +161,9 @@ class UserViewSet(UserViewSet):
 class RecipesViewSet(viewsets.ModelViewSet):
     """Вьюсет для модели рецептов."""
 
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.defer(
+        'search_vector', 'ingredient_ids', 'popularity'
+    )
     permission_classes = (
         ReadOrAuthorOnly,
         permissions.IsAuthenticatedOrReadOnly,
@@ -142,14 +171,19 @@ class RecipesViewSet(viewsets.ModelViewSet):
     pagination_class = PageLimitPaginator
     filter_backends = (
         DjangoFilterBackend,
-        filters.OrderingFilter,
-        filters.SearchFilter,
+        RecipeOrderingFilter,
+        RecipeSearchFilter,
     )
     filterset_class = RecipeFilter
-    ordering_fields = ('created_at')
+    ordering_fields = ('created_at',)
     ordering = ('-created_at',)
     search_fields = ('^ingredients__name',)
 
+    @cache_response('recipes', RECIPES_CACHE_TIMEOUT, anonymous_only=True)
+    def list(self, request, *args, **kwargs):
+        """Список рецептов, для анонимов из кэша."""
+        return super().list(request, *args, **kwargs)
+
     def get_serializer_class(self):
         """Определение класса сериализатора в зависимости от запроса."""
         if self.request.method == 'GET':
@@ -163,7 +197,7 @@ class RecipesViewSet(viewsets.ModelViewSet):
     @action(detail=True, url_path='get-link')
     def get_link(self, request, pk):
         """Полечение короткой ссылки по эндпоинту '/get-link/."""
-        data = get_object_or_404(ShortLink, recipe_id=pk).short_link
+        data = get_short_link(pk)
         short_link = f'{request.get_host()}/s/{data}/'
         return Response({'short-link': short_link}, status=status.HTTP_200_OK)
 
@@ -187,6 +221,65 @@ class RecipesViewSet(viewsets.ModelViewSet):
             pk
         )
 
+    @action(detail=False, permission_classes=(permissions.IsAuthenticated,))
+    def feed(self, request):
+        """
+        Лента рецептов авторов из подписок.
+
+        Постраничный вывод по курсору: параметр cursor берётся из
+        ссылки next предыдущей страницы, limit - размер страницы.
+        """
+        recipes, cursor = get_feed(
+            request.user,
+            request.query_params.get('cursor'),
+            self.paginator.get_page_size(request)
+        )
+        return Response({
+            'next': cursor and replace_query_param(
+                request.build_absolute_uri(), 'cursor', cursor
+            ),
+            'results': self.get_serializer(recipes, many=True).data,
+        })
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        """Похожие рецепты из заранее посчитанного индекса."""
+        similar = [
+            row.similar for row in SimilarRecipe.objects.filter(
+                recipe_id=pk
+            ).select_related('similar').defer(
+                'similar__search_vector',
+                'similar__ingredient_ids',
+                'similar__popularity'
+            ).order_by('-score')[
+                :SIMILAR_RECIPES_COUNT
+            ]
+        ]
+        if not similar:
+            get_object_or_404(Recipe, pk=pk)
+        return Response(
+            ShortRecipeSerializer(
+                similar, many=True, context={'request': request}
+            ).data
+        )
+
+    @action(detail=False)
+    def cook(self, request):
+        """
+        Рецепты из имеющихся ингредиентов.
+
+        Параметры: ingredients - id ингредиентов (можно несколько),
+        missing - сколько ингредиентов рецепта может не хватать.
+        """
+        params = CookSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        page = self.paginate_queryset(cook_with(
+            params.validated_data['ingredients'],
+            params.validated_data['missing']
+        ))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
     @action(detail=False, permission_classes=(permissions.IsAuthenticated,))
     def download_shopping_cart(self, request):
         """Метод для скачивания списпа ингредиентов."""
@@ -210,6 +303,11 @@ class TagsViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TagsSerializer
     pagination_class = None
 
+    @cache_response('tags', CATALOG_CACHE_TIMEOUT)
+    def list(self, request, *args, **kwargs):
+        """Список тегов из кэша."""
+        return super().list(request, *args, **kwargs)
+
 
 class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
     """Вьюсет для модели ингредиентов."""
@@ -220,17 +318,65 @@ class IngredientsViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = (IngredientSearchFilter,)
     search_fields = ('^name',)
 
+    def list(self, request, *args, **kwargs):
+        """Список ингредиентов из общего снимка каталога."""
+        terms = IngredientSearchFilter().get_search_terms(request)
+        return Response(get_catalog().search(terms))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Ингредиент из общего снимка каталога."""
+        try:
+            ingredient = get_catalog().get(int(kwargs['pk']))
+        except ValueError:
+            ingredient = None
+        if ingredient is None:
+            raise Http404
+        return Response(ingredient)
+
 
 class RedirectShortLinkView(views.View):
     """Редиррект с короткой ссылки."""
 
     def get(self, request, short_link):
         """Получение необходимого рецепта по короткой ссылке."""
-        short_link_recipe = get_object_or_404(
-            ShortLink,
-            short_link=short_link
-        )
-        recipe_id = short_link_recipe.recipe_id
+        recipe_id = get_short_link_recipe_id(short_link)
         return redirect(
             request.build_absolute_uri(f'/recipes/{recipe_id}/')
         )
+
+
+class MetricsView(views.View):
+    """Метрики Prometheus всех процессов приложения."""
+
+    def get(self, request):
+        """Выдача метрик в текстовом формате Prometheus."""
+        from api import metrics
+
+        content, content_type = metrics.render()
+        return HttpResponse(content, content_type=content_type)
+
+
+class DatabasePoolView(views.View):
+    """Состояние пулов подключений к базе данных процесса."""
+
+    def get(self, request):
+        """Выдача состояния пулов, доступна только с локального адреса."""
+        if request.META.get('REMOTE_ADDR') not in LOCAL_ADDRESSES:
+            raise Http404
+        from foodgram_backend.postgresql_pool.base import get_pools_stats
+
+        return JsonResponse(get_pools_stats())
+
+
+class ProfileDownloadView(views.APIView):
+    """Скачивание результата профилирования запроса."""
+
+    permission_classes = (permissions.IsAdminUser,)
+    file_name = re.compile(r'^[\w-]+\.(prof|snapshot)$')
+
+    def get(self, request, name):
+        """Выдача файла .prof или .snapshot из PROFILING_DIR."""
+        path = os.path.join(settings.PROFILING_DIR, name)
+        if not self.file_name.match(name) or not os.path.isfile(path):
+            raise Http404
+        return FileResponse(open(path, 'rb'), as_attachment=True)
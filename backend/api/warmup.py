@@ -0,0 +1,115 @@
+"""
+Прогрев процесса перед первыми запросами.
+
+Заполняет резолверы URL, строит поля сериализаторов DRF, отображает
+в память снимок каталога ингредиентов и выполняет внутренние
+GET-запросы к ингредиентам, тегам и первым страницам рецептов, чтобы
+открыть подключения к базе и заполнить кэши.
+
+Ключ кэша ответа включает схему и хост запроса, а данные - построенные
+по ним абсолютные ссылки. Поэтому кэшируемые адреса прогреваются
+только с публичным адресом из WARMUP_ORIGIN (схема и хост, которые
+видит бэкенд за прокси), иначе запрашиваются лишь некэшируемые.
+"""
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.test import Client
+from django.urls import resolve
+
+from api import serializers as api_serializers
+from api.catalog import get_catalog
+from users import serializers as users_serializers
+
+SERIALIZERS = (
+    api_serializers.RecipesIngredientGETSerializer,
+    api_serializers.CreateRecipeIngredientSerializer,
+    api_serializers.IngredientsSerializer,
+    api_serializers.TagsSerializer,
+    api_serializers.RecipesGETSerializer,
+    api_serializers.CreateRecipeSerializer,
+    api_serializers.ShortRecipeSerializer,
+    api_serializers.SubscribeGETSerializer,
+    api_serializers.CreateSubscribeSerializer,
+    api_serializers.AvatarSerializer,
+    api_serializers.ShoppingCartSerializer,
+    api_serializers.FavoriteSerializer,
+    users_serializers.CreateUserSerializer,
+    users_serializers.UsersGETSerializer,
+    users_serializers.SetPasswordSerializer,
+)
+
+
+UNCACHED_URLS = ['/api/ingredients/']
+
+
+def get_cached_urls():
+    """Адреса вью, ответы которых кэшируются по хосту."""
+    return ['/api/tags/'] + [
+        f'/api/recipes/?page={page}'
+        for page in range(1, settings.WARMUP_RECIPE_PAGES + 1)
+    ]
+
+
+def get_urls():
+    """Адреса, запрашиваемые при прогреве."""
+    if not settings.WARMUP_ORIGIN:
+        return UNCACHED_URLS
+    return UNCACHED_URLS + get_cached_urls()
+
+
+def get_host():
+    """Хост из ALLOWED_HOSTS для запросов к некэшируемым адресам."""
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip('.')
+        if host and host != '*':
+            return host
+    return 'localhost'
+
+
+def get_client():
+    """Клиент внутренних запросов от имени публичного адреса."""
+    if not settings.WARMUP_ORIGIN:
+        return Client(SERVER_NAME=get_host())
+    origin = urlsplit(settings.WARMUP_ORIGIN)
+    return Client(
+        HTTP_HOST=origin.netloc, **{'wsgi.url_scheme': origin.scheme}
+    )
+
+
+def prime_urls():
+    """Заполнение резолверов URL."""
+    for url in get_urls():
+        resolve(url.split('?')[0])
+
+
+def prime_serializers():
+    """Построение полей сериализаторов."""
+    for serializer in SERIALIZERS:
+        serializer().fields
+
+
+def prime_requests():
+    """Внутренние запросы к основным спискам."""
+    client = get_client()
+    for url in get_urls():
+        client.get(url)
+
+
+STEPS = (
+    ('urls', prime_urls),
+    ('serializers', prime_serializers),
+    ('catalog', get_catalog),
+    ('requests', prime_requests),
+)
+
+
+def warm_up():
+    """Выполнение всех шагов прогрева, возвращает их время в секундах."""
+    timings = {}
+    for name, step in STEPS:
+        start = time.perf_counter()
+        step()
+        timings[name] = time.perf_counter() - start
+    return timings
@@ -0,0 +1,56 @@
+"""Обработчики логов проекта foodgram."""
+import fcntl
+import os
+from logging.handlers import WatchedFileHandler
+
+
+class SharedRotatingFileHandler(WatchedFileHandler):
+    """
+    Файл лога с ротацией по размеру, в который пишут несколько процессов.
+
+    Когда файл дорастает до max_bytes, процесс, заметивший это,
+    под блокировкой flock на файле .lock переименовывает его в .1,
+    сдвигая предыдущие копии (хранится backup_count). Перед
+    переименованием размер проверяется повторно: ротацию мог уже
+    выполнить другой процесс. Остальные процессы переоткрывают файл
+    по смене inode, как WatchedFileHandler.
+    """
+
+    def __init__(self, filename, max_bytes, backup_count, **kwargs):
+        """Обработчик файла filename."""
+        super().__init__(filename, **kwargs)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+
+    def emit(self, record):
+        """Ротация при необходимости и запись."""
+        if self.is_full():
+            self.rotate()
+        super().emit(record)
+
+    def is_full(self):
+        """Проверка, что файл дорос до max_bytes."""
+        try:
+            return os.stat(self.baseFilename).st_size >= self.max_bytes
+        except FileNotFoundError:
+            return False
+
+    def rotate(self):
+        """Сдвиг копий и переименование файла под блокировкой."""
+        with open(f'{self.baseFilename}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if not self.is_full():
+                    return
+                for index in range(self.backup_count - 1, 0, -1):
+                    source = f'{self.baseFilename}.{index}'
+                    if os.path.exists(source):
+                        os.replace(
+                            source, f'{self.baseFilename}.{index + 1}'
+                        )
+                if self.backup_count:
+                    os.replace(self.baseFilename, f'{self.baseFilename}.1')
+                else:
+                    os.unlink(self.baseFilename)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
@@ -0,0 +1,242 @@
+"""
+Бэкенд PostgreSQL, возвращающий подключения в пул вместо закрытия.
+
+Пул один на процесс и набор параметров подключения: Django закрывает
+подключение в конце каждого запроса, а бэкенд кладёт его обратно, и
+следующий запрос не платит за TCP, аутентификацию и запуск процесса
+PostgreSQL. Настройки пула задаются ключом POOL в DATABASES.
+"""
+import os
+import threading
+import time
+
+import psycopg2
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+pools = {}
+
+pools_lock = threading.Lock()
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул подключений psycopg2.
+
+    Свободные подключения выдаются в порядке LIFO. Подключение,
+    пролежавшее в пуле дольше HEALTH_CHECK_IDLE секунд, перед выдачей
+    проверяется запросом SELECT 1: недавно возвращённое почти
+    наверняка живо, а проверка каждой выдачи добавляла бы обращение
+    к серверу в каждый запрос. Подключения старше MAX_LIFETIME секунд
+    закрываются и заменяются новыми. Если заняты все MAX_SIZE
+    подключений, запрос ждёт освобождения не дольше TIMEOUT секунд.
+    """
+
+    def __init__(self, name, min_size=1, max_size=10, max_lifetime=3600,
+                 timeout=30, health_check_idle=30):
+        """Пустой пул."""
+        self.name = name
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.health_check_idle = health_check_idle
+        self.pid = os.getpid()
+        self.idle = []
+        self.born = {}
+        self.size = 0
+        self.condition = threading.Condition()
+        self.stats = dict.fromkeys(
+            ('connects', 'checkouts', 'waits', 'timeouts', 'recycled',
+             'failed_checks', 'discarded'),
+            0
+        )
+
+    def getconn(self, connect):
+        """Выдача подключения, новые создаются вызовом connect()."""
+        while True:
+            idle = self.acquire()
+            if idle is None:
+                connection = self.open(connect)
+                self.fill(connect)
+                return connection
+            connection, released = idle
+            if self.check(connection, released):
+                return connection
+            self.discard(connection)
+
+    def acquire(self):
+        """
+        Свободное подключение и время его возврата в пул.
+
+        None, если свободных нет и можно открыть новое.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self.condition:
+            self.stats['checkouts'] += 1
+            if not self.idle and self.size >= self.max_size:
+                self.stats['waits'] += 1
+            while not self.idle and self.size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    raise psycopg2.OperationalError(
+                        f'Пул {self.name}: нет свободных подключений '
+                        f'за {self.timeout} с'
+                    )
+                self.condition.wait(remaining)
+            if self.idle:
+                return self.idle.pop()
+            self.size += 1
+            return None
+
+    def open(self, connect):
+        """Открытие подключения в уже занятом слоте пула."""
+        try:
+            connection = connect()
+        except Exception:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.born[id(connection)] = time.monotonic()
+            self.stats['connects'] += 1
+        return connection
+
+    def fill(self, connect):
+        """Открытие подключений до MIN_SIZE."""
+        while True:
+            with self.condition:
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+            try:
+                connection = self.open(connect)
+            except psycopg2.Error:
+                return
+            self.putconn(connection)
+
+    def is_expired(self, connection):
+        """Проверка, что подключение старше MAX_LIFETIME."""
+        born = self.born.get(id(connection), 0)
+        return time.monotonic() - born > self.max_lifetime
+
+    def check(self, connection, released):
+        """Проверка подключения, возвращённого в пул в момент released."""
+        if connection.closed:
+            self.stats['failed_checks'] += 1
+            return False
+        if self.is_expired(connection):
+            self.stats['recycled'] += 1
+            return False
+        if time.monotonic() - released <= self.health_check_idle:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if (
+                connection.get_transaction_status()
+                != extensions.TRANSACTION_STATUS_IDLE
+            ):
+                connection.rollback()
+        except psycopg2.Error:
+            self.stats['failed_checks'] += 1
+            return False
+        return True
+
+    def putconn(self, connection):
+        """Возврат подключения в пул."""
+        if self.pid != os.getpid():
+            return
+        reusable = not connection.closed and not self.is_expired(connection)
+        if reusable:
+            status = connection.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                reusable = False
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    connection.rollback()
+                except psycopg2.Error:
+                    reusable = False
+        if not reusable:
+            self.discard(connection)
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection):
+        """Закрытие подключения и освобождение его слота."""
+        try:
+            connection.close()
+        except psycopg2.Error:
+            pass
+        with self.condition:
+            self.born.pop(id(connection), None)
+            self.size -= 1
+            self.stats['discarded'] += 1
+            self.condition.notify()
+
+    def get_stats(self):
+        """Состояние пула."""
+        with self.condition:
+            return {
+                'pid': self.pid,
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                **self.stats,
+            }
+
+
+def get_pool(alias, settings_dict, conn_params):
+    """Пул текущего процесса для подключения с параметрами conn_params."""
+    key = (alias, repr(sorted(conn_params.items())))
+    with pools_lock:
+        pool = pools.get(key)
+        if pool is None or pool.pid != os.getpid():
+            pool = pools[key] = ConnectionPool(
+                f'{alias}:{conn_params["database"]}',
+                **{
+                    name.lower(): value
+                    for name, value in settings_dict.get('POOL', {}).items()
+                }
+            )
+        return pool
+
+
+def get_pools_stats():
+    """Состояние всех пулов текущего процесса."""
+    with pools_lock:
+        current = [
+            pool for pool in pools.values() if pool.pid == os.getpid()
+        ]
+    return {pool.name: pool.get_stats() for pool in current}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """Подключение к PostgreSQL через пул процесса."""
+
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        """Получение подключения из пула."""
+        self.pool = get_pool(self.alias, self.settings_dict, conn_params)
+        connection = self.pool.getconn(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            )
+        )
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level
+        )
+        return connection
+
+    def _close(self):
+        """Возврат подключения в пул вместо закрытия."""
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.putconn(self.connection)
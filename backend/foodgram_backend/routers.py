@@ -0,0 +1,108 @@
+"""
+Маршрутизация запросов к базе данных между основной базой и репликами.
+
+Чтение в безопасных (GET, HEAD, OPTIONS) запросах уходит на случайную
+реплику из DATABASE_REPLICAS, запись и всё остальное - в основную базу.
+Клиент, который недавно что-то изменил, REPLICA_PIN_SECONDS секунд
+читает из основной базы, чтобы сразу видеть свои избранное, корзину и
+подписки. Отметка ставится в cookie PIN_COOKIE, а для пользователя -
+ещё и в кэш default, если он общий для воркеров (не LocMemCache), что
+нужно клиентам API без cookie. Токены и сессии всегда читаются из
+основной базы, так как используются сразу после создания.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+PRIMARY = 'default'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+PRIMARY_MODELS = ('authtoken.Token', 'sessions.Session')
+
+PIN_COOKIE = 'replica_pin'
+
+routing = ContextVar('routing', default=None)
+
+
+class RoutingState:
+    """Состояние маршрутизации в рамках одного HTTP-запроса."""
+
+    def __init__(self, method, pinned_until=None):
+        """Состояние запроса с методом method и отметкой из cookie."""
+        self.primary = method not in SAFE_METHODS or is_active(pinned_until)
+        self.replica = None
+
+
+def is_active(until):
+    """Проверка, что отметка until (время в секундах) ещё действует."""
+    try:
+        return until is not None and float(until) > time.time()
+    except ValueError:
+        return False
+
+
+def get_pin_cache():
+    """Общий для воркеров кэш отметок или None."""
+    cache = caches['default']
+    if isinstance(cache, LocMemCache):
+        return None
+    return cache
+
+
+def get_pin_key(user_id):
+    """Ключ отметки о недавней записи пользователя."""
+    return f'replica_pin:{user_id}'
+
+
+def pin_user(user_id, until):
+    """Чтение пользователя из основной базы до момента until."""
+    cache = get_pin_cache()
+    if cache is not None:
+        cache.set(get_pin_key(user_id), until, settings.REPLICA_PIN_SECONDS)
+
+
+def set_request_user(user_id):
+    """Учёт отметки пользователя текущего запроса."""
+    state = routing.get()
+    if state is None or state.primary:
+        return
+    cache = get_pin_cache()
+    if cache is not None:
+        state.primary = is_active(cache.get(get_pin_key(user_id)))
+
+
+class ReplicaRouter:
+    """Роутер, отправляющий чтение на реплики, а запись - в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        """База для чтения."""
+        state = routing.get()
+        if (
+            state is None
+            or state.primary
+            or model._meta.label in PRIMARY_MODELS
+        ):
+            return PRIMARY
+        if state.replica is None:
+            state.replica = random.choice(settings.DATABASE_REPLICAS)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        """База для записи, после неё запрос читает из основной базы."""
+        state = routing.get()
+        if state is not None:
+            state.primary = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплики содержат те же данные, что и основная база."""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Миграции применяются только к основной базе."""
+        return db == PRIMARY
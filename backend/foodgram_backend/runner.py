@@ -0,0 +1,24 @@
+"""Раннер тестов проекта foodgram."""
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Раннер тестов со снимком каталога ингредиентов во временном файле."""
+
+    def setup_test_environment(self, **kwargs):
+        """Отдельный путь снимка, чтобы не трогать снимок рабочей базы."""
+        super().setup_test_environment(**kwargs)
+        self.catalog_directory = tempfile.mkdtemp()
+        settings.INGREDIENT_CATALOG_PATH = os.path.join(
+            self.catalog_directory, 'ingredients.catalog'
+        )
+
+    def teardown_test_environment(self, **kwargs):
+        """Удаление временного снимка."""
+        shutil.rmtree(self.catalog_directory, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
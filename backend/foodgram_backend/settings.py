@@ -5,7 +5,12 @@ from pathlib import Path
 from django.core.management.utils import get_random_secret_key
 from dotenv import load_dotenv
 
-from foodgram_backend.utils import get_allowed_hosts, get_debug
+from foodgram_backend.utils import (
+    get_allowed_hosts,
+    get_debug,
+    get_flag,
+    get_replicas
+)
 
 load_dotenv()
 
@@ -21,6 +26,8 @@ CSRF_TRUSTED_ORIGINS = [f'https://{get_allowed_hosts()}']
 
 AUTH_USER_MODEL = 'users.User'
 
+PROJECT_APPS = ('api', 'recipes', 'users', 'foodgram_backend')
+
 INSTALLED_APPS = [
     'django.contrib.admin',
     'django.contrib.auth',
@@ -38,6 +45,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.SlowQueryMiddleware',
+    'api.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -45,8 +56,67 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.ProfilingMiddleware',
 ]
 
+SERVER_TIMING = get_flag('SERVER_TIMING')
+
+METRICS = get_flag('METRICS')
+
+SLOW_QUERY_LOG = get_flag('SLOW_QUERY_LOG')
+
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100))
+
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv('SLOW_QUERY_EXPLAIN_RATE', 0.1))
+
+SLOW_QUERY_LOG_FILE = os.getenv(
+    'SLOW_QUERY_LOG_FILE', BASE_DIR / 'slow_queries.log'
+)
+
+PROFILING = get_flag('PROFILING')
+
+PROFILING_DIR = os.getenv('PROFILING_DIR', BASE_DIR / 'profiles')
+
+PROFILING_KEEP = int(os.getenv('PROFILING_KEEP', 50))
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        'KEY_PREFIX': 'foodgram',
+    }
+}
+
+CACHE_LOCAL_MAXSIZE = int(os.getenv('CACHE_LOCAL_MAXSIZE', 1000))
+
+CACHE_LOCAL_TTL = float(os.getenv('CACHE_LOCAL_TTL', 5))
+
+CACHE_LOCK_TIMEOUT = float(os.getenv('CACHE_LOCK_TIMEOUT', 10))
+
+WARMUP = get_flag('WARMUP', 'True')
+
+WARMUP_RECIPE_PAGES = int(os.getenv('WARMUP_RECIPE_PAGES', 3))
+
+WARMUP_ORIGIN = os.getenv('WARMUP_ORIGIN', '')
+
+INGREDIENT_CATALOG_PATH = os.getenv(
+    'INGREDIENT_CATALOG_PATH', BASE_DIR / 'ingredients.catalog'
+)
+
+TEST_RUNNER = 'foodgram_backend.runner.TestRunner'
+
+CACHE_INVALIDATION_BUS = get_flag('CACHE_INVALIDATION_BUS', 'True')
+
+BACKGROUND_TASKS = get_flag('BACKGROUND_TASKS', 'True')
+
+TOKEN_CACHE_TTL = float(os.getenv('TOKEN_CACHE_TTL', 60))
+
+TOKEN_CACHE_MAXSIZE = int(os.getenv('TOKEN_CACHE_MAXSIZE', 10000))
+
+TOKEN_CACHE_ALIAS = os.getenv('TOKEN_CACHE_ALIAS', '')
+
 ROOT_URLCONF = 'foodgram_backend.urls'
 
 MEDIA_URL = '/media/'
@@ -70,17 +140,48 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'foodgram_backend.wsgi.application'
 
+DB_POOL = get_flag('DB_POOL', 'False')
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': (
+            'foodgram_backend.postgresql_pool' if DB_POOL
+            else 'django.db.backends.postgresql'
+        ),
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'MAX_LIFETIME': float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+            'HEALTH_CHECK_IDLE': float(
+                os.getenv('DB_POOL_HEALTH_CHECK_IDLE', 30)
+            ),
+        }
     }
 }
 
+DATABASE_REPLICAS = []
+
+for number, (host, port) in enumerate(get_replicas(), 1):
+    DATABASE_REPLICAS.append(f'replica{number}')
+    DATABASES[DATABASE_REPLICAS[-1]] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = (
+    ['foodgram_backend.routers.ReplicaRouter'] if DATABASE_REPLICAS else []
+)
+
+REPLICA_PIN_SECONDS = float(os.getenv('REPLICA_PIN_SECONDS', 5))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -118,7 +219,7 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.TokenAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
@@ -143,4 +244,34 @@ AUTHENTICATION_BACKENDS = [
     "djoser.auth_backends.LoginFieldBackend",
 ]
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+        'slow_queries': {
+            'class': 'foodgram_backend.log_handlers.SharedRotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'max_bytes': 10 * 1024 * 1024,
+            'backup_count': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'foodgram.performance': {
+            'handlers': ['console'],
+            'level': os.getenv('PERFORMANCE_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+        'foodgram.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
 SILENCED_SYSTEM_CHECKS = ["auth.W004"]
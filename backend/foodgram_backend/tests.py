@@ -0,0 +1,192 @@
+"""Тесты пула подключений PostgreSQL и обработчиков логов."""
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import psycopg2
+from django.db import connection
+from django.test import SimpleTestCase
+
+from foodgram_backend.log_handlers import SharedRotatingFileHandler
+from foodgram_backend.postgresql_pool.base import (
+    ConnectionPool,
+    get_pool,
+    pools
+)
+
+
+@unittest.skipUnless(
+    connection.vendor == 'postgresql', 'Пул работает только с PostgreSQL'
+)
+class ConnectionPoolTests(SimpleTestCase):
+    """Выдача, возврат и замена подключений пула."""
+
+    def setUp(self):
+        """Параметры подключения к тестовой базе."""
+        self.params = connection.get_connection_params()
+        self.pools = []
+
+    def tearDown(self):
+        """Закрытие подключений созданных пулов."""
+        for pool in self.pools:
+            for idle, _ in pool.idle:
+                idle.close()
+
+    def connect(self):
+        """Новое подключение к тестовой базе."""
+        return psycopg2.connect(**self.params)
+
+    def get_pool(self, **options):
+        """Пул на два подключения с проверкой при каждой выдаче."""
+        pool = ConnectionPool(
+            'test', **{'min_size': 1, 'max_size': 2, 'timeout': 0.1,
+                       'health_check_idle': 0, **options}
+        )
+        self.pools.append(pool)
+        return pool
+
+    def terminate(self, pool_connection):
+        """Разрыв подключения со стороны сервера."""
+        with self.connect() as admin, admin.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_terminate_backend(%s)',
+                [pool_connection.get_backend_pid()]
+            )
+        admin.close()
+
+    def test_returned_connection_is_reused(self):
+        """Возвращённое подключение выдаётся снова без нового."""
+        pool = self.get_pool()
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+        self.assertIs(pool.getconn(self.connect), first)
+        self.assertEqual(pool.stats['connects'], 1)
+        pool.putconn(first)
+
+    def test_exhausted_pool_times_out(self):
+        """Когда заняты все подключения, запрос ждёт не дольше TIMEOUT."""
+        pool = self.get_pool()
+        taken = [pool.getconn(self.connect) for _ in range(2)]
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.getconn(self.connect)
+        self.assertEqual(pool.stats['timeouts'], 1)
+        for pool_connection in taken:
+            pool.putconn(pool_connection)
+
+    def test_expired_connection_is_replaced(self):
+        """Подключение старше MAX_LIFETIME закрывается при выдаче."""
+        pool = self.get_pool(max_lifetime=60)
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+        pool.born[id(first)] -= 61
+        second = pool.getconn(self.connect)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats['recycled'], 1)
+        pool.putconn(second)
+
+    def test_broken_connection_is_discarded(self):
+        """Разорванное сервером подключение заменяется новым."""
+        pool = self.get_pool()
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+        self.terminate(first)
+        second = pool.getconn(self.connect)
+        self.assertIsNot(second, first)
+        self.assertEqual(pool.stats['failed_checks'], 1)
+        with second.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        pool.putconn(second)
+
+    def test_recently_returned_connection_is_not_checked(self):
+        """Недавно возвращённое подключение выдаётся без SELECT 1."""
+        pool = self.get_pool(health_check_idle=60)
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+        self.terminate(first)
+        self.assertIs(pool.getconn(self.connect), first)
+        self.assertEqual(pool.stats['failed_checks'], 0)
+        pool.discard(first)
+
+    def test_idle_connection_is_checked(self):
+        """Подключение, давно лежащее в пуле, проверяется перед выдачей."""
+        pool = self.get_pool(health_check_idle=60)
+        first = pool.getconn(self.connect)
+        pool.putconn(first)
+        pool.idle[-1] = (first, time.monotonic() - 61)
+        self.terminate(first)
+        self.assertIsNot(pool.getconn(self.connect), first)
+        self.assertEqual(pool.stats['failed_checks'], 1)
+
+    def test_pool_is_reset_after_fork(self):
+        """Дочерний процесс получает свой пул и не трогает чужой."""
+        settings_dict = {'POOL': {'MIN_SIZE': 0}}
+        pool = get_pool('fork-test', settings_dict, self.params)
+        self.pools.append(pool)
+        self.addCleanup(
+            pools.pop, ('fork-test', repr(sorted(self.params.items())))
+        )
+        pool.putconn(pool.getconn(self.connect))
+        pid = os.fork()
+        if pid == 0:
+            child = get_pool('fork-test', settings_dict, self.params)
+            inherited = pool.idle[0][0]
+            pool.putconn(inherited)
+            os._exit(
+                0 if child is not pool and child.size == 0
+                and len(pool.idle) == 1 else 1
+            )
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+        self.assertIs(get_pool('fork-test', settings_dict, self.params), pool)
+
+
+class SharedRotatingFileHandlerTests(SimpleTestCase):
+    """Ротация лога, в который пишут несколько процессов."""
+
+    def setUp(self):
+        """Два обработчика одного файла, как в двух воркерах."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'slow_queries.log')
+        self.handlers = [
+            SharedRotatingFileHandler(
+                self.path, max_bytes=100, backup_count=2, encoding='utf-8'
+            )
+            for _ in range(2)
+        ]
+        for handler in self.handlers:
+            self.addCleanup(handler.close)
+
+    def write(self, handler, message):
+        """Запись строки message через handler."""
+        handler.emit(logging.makeLogRecord({'msg': message}))
+
+    def read(self, suffix=''):
+        """Содержимое файла лога или его копии."""
+        with open(self.path + suffix, encoding='utf-8') as file:
+            return file.read().split()
+
+    def test_rotation_is_shared_between_processes(self):
+        """Ротация одного обработчика подхватывается другим."""
+        first, second = self.handlers
+        self.write(first, 'a' * 100)
+        self.write(second, 'b')
+        self.write(first, 'c')
+        self.assertEqual(self.read('.1'), ['a' * 100])
+        self.assertEqual(self.read(), ['b', 'c'])
+
+    def test_only_backup_count_copies_are_kept(self):
+        """Хранится не больше backup_count копий."""
+        first, second = self.handlers
+        for handler, message in zip(
+            (first, second, first, second), 'wxyz'
+        ):
+            self.write(handler, message * 100)
+        self.assertEqual(self.read(), ['z' * 100])
+        self.assertEqual(self.read('.1'), ['y' * 100])
+        self.assertEqual(self.read('.2'), ['x' * 100])
+        self.assertFalse(os.path.exists(self.path + '.3'))
@@ -4,7 +4,11 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
-from api.views import RedirectShortLinkView
+from api.views import (
+    DatabasePoolView,
+    MetricsView,
+    RedirectShortLinkView
+)
 
 
 urlpatterns = [
@@ -18,3 +22,9 @@ urlpatterns = [
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL,
                           document_root=settings.MEDIA_ROOT)
+
+if settings.METRICS:
+    urlpatterns += [path('metrics/', MetricsView.as_view())]
+
+if settings.DB_POOL:
+    urlpatterns += [path('db-pool/', DatabasePoolView.as_view())]
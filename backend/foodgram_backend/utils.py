@@ -1,4 +1,4 @@
-"""Утилиты для определения хостов и состояния дебага."""
+"""Утилиты для чтения настроек проекта из переменных окружения."""
 import os
 
 
@@ -11,3 +11,17 @@ def get_allowed_hosts():
     """Получение доступных хостов."""
     allowed_hosts = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1')
     return [host.strip() for host in allowed_hosts.split(',')]
+
+
+def get_flag(name, default='False'):
+    """Получение логического флага из переменной окружения."""
+    return os.getenv(name, default).lower() == 'true'
+
+
+def get_replicas():
+    """Получение адресов реплик базы данных в формате host[:port]."""
+    replicas = os.getenv('DB_REPLICAS', '')
+    return [
+        host.strip().partition(':')[::2]
+        for host in replicas.split(',') if host.strip()
+    ]
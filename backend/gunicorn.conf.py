@@ -0,0 +1,68 @@
+"""Настройки gunicorn."""
+import os
+import shutil
+import time
+
+STARTED = time.monotonic()
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+if os.getenv('METRICS', 'False').lower() == 'true':
+    os.environ.setdefault(
+        'PROMETHEUS_MULTIPROC_DIR', '/tmp/foodgram_metrics'
+    )
+
+
+def on_starting(server):
+    """Очистка файлов метрик предыдущего запуска."""
+    directory = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def when_ready(server):
+    """Время запуска мастера."""
+    server.log.info(
+        'Мастер готов за %.2f с', time.monotonic() - STARTED
+    )
+
+
+def post_fork(server, worker):
+    """Сброс подключений к базе, унаследованных от мастера."""
+    if server.cfg.preload_app:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def post_worker_init(worker):
+    """Запуск шины сброса кэшей и прогрев воркера до первых запросов."""
+    from django.conf import settings
+
+    from api.invalidation import start_listener
+
+    start_listener()
+    if not settings.WARMUP:
+        return
+    from api.warmup import warm_up
+
+    timings = warm_up()
+    worker.log.info(
+        'Воркер %s прогрет за %.1f мс (%s), готов через %.2f с после запуска',
+        worker.pid,
+        sum(timings.values()) * 1000,
+        ', '.join(
+            f'{name} {duration * 1000:.1f} мс'
+            for name, duration in timings.items()
+        ),
+        time.monotonic() - STARTED
+    )
+
+
+def child_exit(server, worker):
+    """Пометка метрик завершившегося воркера."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
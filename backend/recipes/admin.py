@@ -1,7 +1,10 @@
 """Настройки админки."""
 from django.contrib import admin
+from django.db.models import Count
 
+from api.catalog import get_catalog
 from api.constants import MIN_NUM
+from api.paginations import EstimatedCountPaginator
 from recipes.models import (
     Ingredient,
     Favorite,
@@ -9,7 +12,6 @@ from recipes.models import (
     RecipeIngredient,
     RecipeTag,
     ShoppingCart,
-    ShortLink,
     Tag
 )
 
@@ -20,6 +22,7 @@ class IngredientInLine(admin.TabularInline):
     model = RecipeIngredient
     extra = 0
     min_num = MIN_NUM
+    autocomplete_fields = ('ingredient',)
 
 
 class TagInLine(admin.TabularInline):
@@ -28,6 +31,7 @@ class TagInLine(admin.TabularInline):
     model = RecipeTag
     extra = 0
     min_num = MIN_NUM
+    autocomplete_fields = ('tag',)
 
 
 class FavoriteInLine(admin.TabularInline):
@@ -35,6 +39,7 @@ class FavoriteInLine(admin.TabularInline):
 
     model = Favorite
     extra = 0
+    autocomplete_fields = ('user',)
 
 
 class ShoppingCartInline(admin.TabularInline):
@@ -42,6 +47,7 @@ class ShoppingCartInline(admin.TabularInline):
 
     model = ShoppingCart
     extra = 0
+    autocomplete_fields = ('user',)
 
 
 @admin.register(Ingredient)
@@ -49,7 +55,17 @@ class IngredientAdmin(admin.ModelAdmin):
     """Класс настройки ингредиентов."""
 
     list_display = ('pk', 'name', 'measurement_unit')
-    search_fields = ('name',)
+    search_fields = ('^name',)
+    ordering = ('name',)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по началу названия через снимок каталога, как в API."""
+        terms = search_term.replace(',', ' ').split()
+        if not terms:
+            return queryset, False
+        return queryset.filter(pk__in=[
+            row['id'] for row in get_catalog().search(terms)
+        ]), False
 
 
 @admin.register(Tag)
@@ -57,7 +73,8 @@ class TagAdmin(admin.ModelAdmin):
     """Класс настройки тегов."""
 
     list_display = ('pk', 'name', 'slug')
-    search_fields = ('name',)
+    search_fields = ('^name',)
+    ordering = ('name',)
 
 
 @admin.register(Recipe)
@@ -78,12 +95,25 @@ class RecipeAdmin(admin.ModelAdmin):
     )
     search_fields = ('name', 'author__username',)
     list_filter = ('tags',)
+    autocomplete_fields = ('author',)
     inlines = (
         IngredientInLine,
         FavoriteInLine,
         ShoppingCartInline,
         TagInLine,
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        """Рецепты с данными для списка за постоянное число запросов."""
+        return super().get_queryset(request).select_related(
+            'author'
+        ).prefetch_related(
+            'ingredients', 'tags', 'shortlink_set'
+        ).annotate(
+            favorites_count=Count('favorites')
+        ).defer('search_vector', 'ingredient_ids', 'popularity')
 
     @admin.display(description='Ингредиенты')
     def get_ingredient(self, instance):
@@ -95,10 +125,10 @@ class RecipeAdmin(admin.ModelAdmin):
         """Метод для отображения тегов."""
         return ', '.join(value.name for value in instance.tags.all())
 
-    @admin.display(description='В избранном')
+    @admin.display(description='В избранном', ordering='favorites_count')
     def get_is_favorited_count(self, instance):
         """Метод для отображения количества добавлений рецепта в избранное."""
-        count = Favorite.objects.filter(recipe_id=instance.pk).count()
+        count = instance.favorites_count
         if count == 1:
             return f'У {count} пользователя.'
         if count == 0:
@@ -108,5 +138,6 @@ class RecipeAdmin(admin.ModelAdmin):
     @admin.display(description='Короткая ссылка на рецепт')
     def get_short_link(self, instance):
         """Метод для отображения короткой ссылки на рецепт."""
-        link = ShortLink.objects.get(recipe=instance).short_link
-        return f'/s/{link}/'
+        for link in instance.shortlink_set.all():
+            return f'/s/{link.short_link}/'
+        return '-'
@@ -0,0 +1,257 @@
+"""Management команда генерации синтетических данных."""
+import random
+import time
+from itertools import accumulate
+
+import shortuuid
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from api.invalidation import broadcast
+from api.constants import LOAD_BATCH_SIZE, SHORT_LINK_LENGTH
+from api.search import update_search_index
+from recipes.management.utils import batches
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    ShoppingCart,
+    ShortLink,
+    Tag
+)
+from users.models import Subscribe, User
+
+TAGS = (
+    ('Завтрак', 'breakfast'),
+    ('Обед', 'lunch'),
+    ('Ужин', 'dinner'),
+    ('Десерт', 'dessert'),
+    ('Выпечка', 'bakery'),
+    ('Напитки', 'drinks'),
+)
+
+PASSWORD = 'generated-password'
+
+IMAGE = 'recipes/images/generated.png'
+
+ZIPF_EXPONENT = 1.1
+
+
+class Zipf:
+    """Выбор элементов с популярностью по закону Ципфа."""
+
+    def __init__(self, rng, population, exponent=ZIPF_EXPONENT):
+        """Популярность назначается случайной перестановке элементов."""
+        self.rng = rng
+        self.population = list(population)
+        rng.shuffle(self.population)
+        self.cum_weights = list(accumulate(
+            1 / rank ** exponent
+            for rank in range(1, len(self.population) + 1)
+        ))
+
+    def choices(self, k):
+        """Выбор k элементов с повторениями."""
+        return self.rng.choices(
+            self.population, cum_weights=self.cum_weights, k=k
+        )
+
+    def sample(self, k, exclude=None):
+        """Выбор не более k различных элементов."""
+        k = min(k, len(self.population) - (exclude is not None))
+        result = set()
+        for _ in range(k * 4):
+            if len(result) >= k:
+                break
+            result.update(
+                item for item in self.choices(k - len(result))
+                if item != exclude
+            )
+        return sorted(result)
+
+
+class Command(BaseCommand):
+    """
+    Класс генерации синтетических данных для нагрузочного тестирования.
+
+    Пользователи, рецепты, подписки, избранное и списки покупок
+    создаются пачками через bulk_create. Популярность авторов, рецептов
+    и ингредиентов распределена по Ципфу. Одинаковый --seed на пустой
+    базе с теми же ингредиентами даёт одинаковый набор данных.
+    """
+
+    help = 'Генерация синтетических данных для нагрузочного тестирования.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument(
+            '--subscriptions', type=int, default=10,
+            help='Среднее количество подписок на пользователя.'
+        )
+        parser.add_argument(
+            '--favorites', type=int, default=20,
+            help='Среднее количество рецептов в избранном у пользователя.'
+        )
+        parser.add_argument(
+            '--carts', type=int, default=5,
+            help='Среднее количество рецептов в списке покупок.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--prefix', default='gen',
+            help='Префикс имён сгенерированных пользователей.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=LOAD_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        """handle."""
+        if options['users'] < 1:
+            raise CommandError('--users должен быть больше нуля')
+        if not Ingredient.objects.exists():
+            raise CommandError(
+                'Нет ингредиентов: сначала выполните manage.py loaddata'
+            )
+        if User.objects.filter(
+            username__startswith=options['prefix']
+        ).exists():
+            raise CommandError(
+                f'Пользователи с префиксом "{options["prefix"]}" уже есть, '
+                'укажите другой --prefix'
+            )
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        users = self.step('users', self.create_users, options)
+        recipes = self.step(
+            'recipes', self.create_recipes, users, options['recipes']
+        )
+        self.step(
+            'search', update_search_index,
+            Recipe.objects.filter(search_vector__isnull=True)
+        )
+        self.step(
+            'subscriptions', self.create_subscriptions,
+            users, options['subscriptions']
+        )
+        self.step(
+            'favorites', self.create_user_recipes,
+            Favorite, users, recipes, options['favorites']
+        )
+        self.step(
+            'carts', self.create_user_recipes,
+            ShoppingCart, users, recipes, options['carts']
+        )
+        broadcast('tags')
+        broadcast('recipes')
+        self.stdout.write(self.style.SUCCESS('Данные успешно сгенерированы'))
+
+    def step(self, name, method, *args):
+        """Выполнение шага генерации с выводом времени."""
+        start = time.perf_counter()
+        result = method(*args)
+        self.stdout.write(f'{name}: {time.perf_counter() - start:.2f} с')
+        return result
+
+    def bulk_create(self, model, objects):
+        """Пакетная вставка объектов."""
+        for batch in batches(objects, self.batch_size):
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def new_ids(self, model, objects):
+        """Вставка объектов и получение их идентификаторов."""
+        last_id = model.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+        self.bulk_create(model, objects)
+        return list(
+            model.objects.filter(id__gt=last_id)
+            .order_by('id').values_list('id', flat=True)
+        )
+
+    def create_users(self, options):
+        """Создание пользователей с общим хешем пароля."""
+        password = make_password(PASSWORD)
+        prefix = options['prefix']
+        return self.new_ids(User, (
+            User(
+                username=f'{prefix}{number}',
+                email=f'{prefix}{number}@example.com',
+                first_name=f'Имя{number}',
+                last_name=f'Фамилия{number}',
+                password=password,
+            )
+            for number in range(options['users'])
+        ))
+
+    def create_recipes(self, users, count):
+        """Создание рецептов с тегами, ингредиентами и короткими ссылками."""
+        authors = Zipf(self.rng, users)
+        recipe_ids = self.new_ids(Recipe, (
+            Recipe(
+                name=f'Рецепт {number}',
+                text=f'Описание рецепта {number}',
+                image=IMAGE,
+                cooking_time=self.rng.randint(5, 180),
+                author_id=author_id,
+            )
+            for number, author_id in enumerate(authors.choices(count))
+        ))
+        tags = Zipf(self.rng, [
+            Tag.objects.get_or_create(name=name, slug=slug)[0].id
+            for name, slug in TAGS
+        ])
+        ingredients = Zipf(
+            self.rng,
+            Ingredient.objects.order_by('id').values_list('id', flat=True)
+        )
+        self.bulk_create(RecipeTag, (
+            RecipeTag(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in tags.sample(self.rng.randint(1, 3))
+        ))
+        self.bulk_create(RecipeIngredient, (
+            RecipeIngredient(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=self.rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in ingredients.sample(self.rng.randint(3, 12))
+        ))
+        alphabet = shortuuid.get_alphabet()
+        self.bulk_create(ShortLink, (
+            ShortLink(
+                recipe_id=recipe_id,
+                short_link=''.join(
+                    self.rng.choices(alphabet, k=SHORT_LINK_LENGTH)
+                ),
+            )
+            for recipe_id in recipe_ids
+        ))
+        return recipe_ids
+
+    def create_subscriptions(self, users, average):
+        """Создание подписок на популярных авторов."""
+        authors = Zipf(self.rng, users)
+        self.bulk_create(Subscribe, (
+            Subscribe(user_id=user_id, author_id=author_id)
+            for user_id in users
+            for author_id in authors.sample(
+                self.rng.randint(0, 2 * average), exclude=user_id
+            )
+        ))
+
+    def create_user_recipes(self, model, users, recipes, average):
+        """Создание записей избранного или списка покупок."""
+        if not recipes:
+            return
+        popular = Zipf(self.rng, recipes)
+        self.bulk_create(model, (
+            model(user_id=user_id, recipe_id=recipe_id)
+            for user_id in users
+            for recipe_id in popular.sample(self.rng.randint(0, 2 * average))
+        ))
@@ -1,25 +1,151 @@
-"""Management команда импорта csv."""
+"""Management команда импорта ингредиентов из csv/json."""
 import csv
+import io
+import json
+import os
+import time
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 
-from api.constants import DIRECTORY
+from api.catalog import write_snapshot
+from api.invalidation import broadcast
+from api.constants import DIRECTORY, LOAD_BATCH_SIZE
+from recipes.management.utils import batches
 from recipes.models import Ingredient
 
 TABLES = {Ingredient: 'ingredients.csv'}
 
+FIELDS = ('name', 'measurement_unit')
+
+
+def read_csv(file):
+    """Построчное чтение csv-файла."""
+    for row in csv.DictReader(file):
+        yield tuple(row[field] for field in FIELDS)
+
+
+def read_json(file):
+    """Чтение json-файла со списком объектов."""
+    for row in json.load(file):
+        yield tuple(row[field] for field in FIELDS)
+
+
+READERS = {'.csv': read_csv, '.json': read_json}
+
 
 class Command(BaseCommand):
-    """Класс импорта данных из csv."""
+    """
+    Класс импорта данных из csv/json.
+
+    Повторный запуск не падает на уникальном ограничении:
+    уже существующие записи пропускаются (ON CONFLICT DO NOTHING).
+    На PostgreSQL данные загружаются через COPY во временную таблицу.
+    """
 
-    def handle(self, *args, **kwargs):
+    help = 'Загрузка ингредиентов из csv или json файла.'
+
+    def add_arguments(self, parser):
+        """Аргументы команды."""
+        parser.add_argument(
+            'files',
+            nargs='*',
+            help='Пути к csv/json файлам (по умолчанию data/ingredients.csv).'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=LOAD_BATCH_SIZE,
+            help='Количество строк в одной пачке.'
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Не использовать COPY даже на PostgreSQL.'
+        )
+
+    def handle(self, *args, **options):
         """handle."""
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        use_copy = (
+            connection.vendor == 'postgresql' and not options['no_copy']
+        )
         for model, file in TABLES.items():
-            with open(
-                f'{DIRECTORY}{file}',
-                'r',
-                encoding='utf-8'
-            ) as csv_file:
-                reader = csv.DictReader(csv_file)
-                model.objects.bulk_create(model(**data) for data in reader)
+            for path in options['files'] or [f'{DIRECTORY}{file}']:
+                self.load(model, path, options['batch_size'], use_copy)
+        write_snapshot()
+        broadcast('recipes')
         self.stdout.write(self.style.SUCCESS('Данные успешно загружены'))
+
+    def load(self, model, path, batch_size, use_copy):
+        """Загрузка одного файла в таблицу модели."""
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError(f'Неподдерживаемый формат файла: {path}')
+        load_batch = self.copy_batch if use_copy else self.insert_batch
+        read = created = 0
+        start = time.perf_counter()
+        with open(path, 'r', encoding='utf-8') as file:
+            with transaction.atomic():
+                if use_copy:
+                    self.create_staging()
+                for batch in batches(reader(file), batch_size):
+                    read += len(batch)
+                    created += load_batch(model, batch)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f'{path}: прочитано {read}, добавлено {created}, '
+            f'{elapsed:.2f} с, {read / elapsed if elapsed else read:.0f} '
+            'строк/с'
+        )
+
+    def insert_batch(self, model, batch):
+        """
+        Вставка пачки одним INSERT с пропуском дубликатов.
+
+        Количество добавленных строк берётся из rowcount, без подсчёта
+        строк таблицы до и после пачки.
+        """
+        columns = ', '.join(FIELDS)
+        values = ', '.join(
+            [f'({", ".join(["%s"] * len(FIELDS))})'] * len(batch)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {model._meta.db_table} ({columns}) '
+                f'VALUES {values} '
+                f'ON CONFLICT ({columns}) DO NOTHING',
+                [value for row in batch for value in row]
+            )
+            return cursor.rowcount
+
+    def create_staging(self):
+        """Создание временной таблицы для COPY."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TEMP TABLE ingredient_staging '
+                '(name text, measurement_unit text) ON COMMIT DROP'
+            )
+
+    def copy_batch(self, model, batch):
+        """Загрузка пачки через COPY и перенос в основную таблицу."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                'COPY ingredient_staging (name, measurement_unit) '
+                'FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+            cursor.execute(
+                f'INSERT INTO {model._meta.db_table} '
+                '(name, measurement_unit) '
+                'SELECT DISTINCT name, measurement_unit '
+                'FROM ingredient_staging '
+                'ON CONFLICT (name, measurement_unit) DO NOTHING'
+            )
+            created = cursor.rowcount
+            cursor.execute('TRUNCATE ingredient_staging')
+        return created
@@ -0,0 +1,12 @@
+"""Утилиты management-команд."""
+from itertools import islice
+
+
+def batches(rows, size):
+    """Разбиение потока строк на пачки заданного размера."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
@@ -1,9 +1,13 @@
 """Модели проекта Foodgram."""
 import shortuuid
 
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.dispatch import receiver
+from django.utils import timezone
 
 from api.constants import (
     IMAGE_UPLOAD_DIRECTORY,
@@ -99,6 +103,22 @@ class Recipe(models.Model):
         auto_now_add=True,
         verbose_name='Создан'
     )
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False
+    )
+    ingredient_ids = ArrayField(
+        models.BigIntegerField(),
+        verbose_name='Идентификаторы ингредиентов',
+        null=True,
+        editable=False
+    )
+    popularity = models.FloatField(
+        'Популярность',
+        default=0,
+        editable=False
+    )
 
     class Meta:
         """Класс Meta для модели рецепта."""
@@ -107,6 +127,20 @@ class Recipe(models.Model):
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ['created_at']
+        indexes = (
+            GinIndex(
+                fields=['search_vector'],
+                name='recipe_search_vector_idx'
+            ),
+            GinIndex(
+                fields=['ingredient_ids'],
+                name='recipe_ingredient_ids_idx'
+            ),
+            models.Index(
+                fields=['-popularity', '-id'],
+                name='recipe_popularity_idx'
+            ),
+        )
 
     def __str__(self):
         """Переопределение метода __str__."""
@@ -177,6 +211,108 @@ class RecipeTag(models.Model):
         return f'{self.recipe} принадлежит к тегу {self.tag}'
 
 
+class RecipeBucket(models.Model):
+    """Корзина LSH, в которую попадает рецепт."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    bucket = models.BigIntegerField('Корзина', db_index=True)
+
+    class Meta:
+        """Класс Meta для корзины LSH."""
+
+        verbose_name = 'Корзина LSH'
+        verbose_name_plural = 'Корзины LSH'
+        default_related_name = 'buckets'
+
+    def __str__(self):
+        """Переопределение метода __str__."""
+        return f'{self.recipe} в корзине {self.bucket}'
+
+
+class SimilarRecipe(models.Model):
+    """Похожий рецепт, найденный через MinHash."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_recipes',
+        verbose_name='Рецепт',
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий рецепт',
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        """Класс Meta для похожего рецепта."""
+
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        ordering = ('recipe', '-score')
+        constraints = (
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'],
+                name='unique_similar_recipes'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=['recipe', '-score'],
+                name='similar_recipe_score_idx'
+            ),
+        )
+
+    def __str__(self):
+        """Переопределение метода __str__."""
+        return f'{self.similar} похож на {self.recipe}'
+
+
+class FeedEntry(models.Model):
+    """Рецепт автора в ленте подписчика."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+    created_at = models.DateTimeField('Создан')
+
+    class Meta:
+        """Класс Meta для записи ленты."""
+
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        default_related_name = 'feed_entries'
+        constraints = (
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entries'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=['user', '-created_at', '-recipe'],
+                name='feed_entry_user_created_idx'
+            ),
+        )
+
+    def __str__(self):
+        """Переопределение метода __str__."""
+        return f'{self.recipe} в ленте {self.user}'
+
+
 class Favorite(models.Model):
     """Модель 'Избранное'."""
 
@@ -188,6 +324,7 @@ class Favorite(models.Model):
         User,
         on_delete=models.CASCADE,
     )
+    created_at = models.DateTimeField('Добавлен', default=timezone.now)
 
     class Meta:
         """Класс Meta для модели избранного."""
@@ -220,6 +357,7 @@ class ShoppingCart(models.Model):
         User,
         on_delete=models.CASCADE,
     )
+    created_at = models.DateTimeField('Добавлен', default=timezone.now)
 
     class Meta:
         """Класс Meta для модели списка покупок."""
@@ -0,0 +1,100 @@
+"""Тесты админ-зоны рецептов и пользователей."""
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    RecipeTag,
+    Tag
+)
+from users.models import Subscribe, User
+
+# Сессия, пользователь, фильтр тегов, счётчик и страница рецептов,
+# prefetch ингредиентов, тегов и коротких ссылок.
+RECIPE_CHANGELIST_QUERIES = 8
+
+# Сессия, пользователь, два счётчика, страница и prefetch подписок.
+USER_CHANGELIST_QUERIES = 7
+
+
+class ChangelistQueriesTests(TestCase):
+    """Количество запросов списков админ-зоны не зависит от размера."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Рецепты с ингредиентами, тегами, избранным и подписками."""
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='password',
+            first_name='Админ', last_name='Админов'
+        )
+        tags = [
+            Tag.objects.create(name=f'Тег {number}', slug=f'tag{number}')
+            for number in range(3)
+        ]
+        cls.tag = tags[0]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(5)
+        ]
+        for number in range(10):
+            author = User.objects.create_user(
+                username=f'user{number}',
+                email=f'user{number}@example.com',
+                password='password',
+                first_name='Имя',
+                last_name='Фамилия'
+            )
+            Subscribe.objects.create(user=author, author=cls.admin)
+            recipe = Recipe.objects.create(
+                name=f'Рецепт {number}', text='Текст', author=author,
+                image='recipes/images/image.png'
+            )
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=1
+                )
+                for ingredient in ingredients
+            )
+            RecipeTag.objects.bulk_create(
+                RecipeTag(recipe=recipe, tag=tag) for tag in tags
+            )
+            Favorite.objects.create(user=author, recipe=recipe)
+
+    def setUp(self):
+        """Вход администратора."""
+        self.client.force_login(self.admin)
+
+    def assert_queries(self, url, expected):
+        """Проверка количества запросов страницы."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len(context), expected,
+            '\n'.join(query['sql'] for query in context.captured_queries)
+        )
+
+    def test_recipe_changelist(self):
+        """Список рецептов."""
+        expected = RECIPE_CHANGELIST_QUERIES
+        if connection.vendor == 'postgresql':
+            # Оценка количества строк по pg_class.reltuples.
+            expected += 1
+        self.assert_queries('/admin/recipes/recipe/', expected)
+
+    def test_filtered_recipe_changelist(self):
+        """Отфильтрованный список рецептов считается точно, без оценки."""
+        self.assert_queries(
+            f'/admin/recipes/recipe/?tags__id__exact={self.tag.pk}',
+            RECIPE_CHANGELIST_QUERIES
+        )
+
+    def test_user_changelist(self):
+        """Список пользователей."""
+        self.assert_queries('/admin/users/user/', USER_CHANGELIST_QUERIES)
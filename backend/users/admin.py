@@ -1,6 +1,7 @@
 """Настройки админ-зоны пользователей."""
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Prefetch
 
 from users.models import Subscribe, User
 
@@ -18,8 +19,18 @@ class UserAdmin(UserAdmin):
     )
     search_fields = ('username', 'email',)
 
+    def get_queryset(self, request):
+        """Пользователи с подписками за один дополнительный запрос."""
+        return super().get_queryset(request).prefetch_related(
+            Prefetch(
+                'subscribe_user',
+                queryset=Subscribe.objects.select_related('author')
+            )
+        )
+
     @admin.display(description='Подписан на')
     def get_authors(self, instance):
         """Метод для отображения подписок."""
-        authors = Subscribe.objects.filter(user_id=instance.id)
-        return ', '.join(str(element.author) for element in authors)
+        return ', '.join(
+            str(element.author) for element in instance.subscribe_user.all()
+        )
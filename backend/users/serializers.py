@@ -3,10 +3,11 @@ from djoser.serializers import UserCreateSerializer
 from rest_framework import serializers
 
 from api.constants import USER_MAX_LENGHT
+from api.timing import TimedSerializerMixin
 from users.models import User
 
 
-class CreateUserSerializer(UserCreateSerializer):
+class CreateUserSerializer(TimedSerializerMixin, UserCreateSerializer):
     """
     Сериализатор на создание пользователя.
 
@@ -47,7 +48,7 @@ class CreateUserSerializer(UserCreateSerializer):
         return data
 
 
-class UsersGETSerializer(serializers.ModelSerializer):
+class UsersGETSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Сериализатор получения объекта пользователя."""
 
     is_subscribed = serializers.SerializerMethodField()
@@ -75,7 +76,7 @@ class UsersGETSerializer(serializers.ModelSerializer):
         )
 
 
-class SetPasswordSerializer(serializers.Serializer):
+class SetPasswordSerializer(TimedSerializerMixin, serializers.Serializer):
     """Сериализатор для смены пароля."""
 
     new_password = serializers.CharField(max_length=USER_MAX_LENGHT)
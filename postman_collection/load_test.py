@@ -0,0 +1,362 @@
+"""
+Нагрузочное воспроизведение postman-коллекции.
+
+Каждый виртуальный пользователь проходит запросы коллекции по порядку
+со своим набором переменных: email и username получают уникальный
+суффикс, а переменные, которые коллекция сохраняет из ответов
+(pm.collectionVariables.set), извлекаются из JSON ответа.
+Скрипт использует только стандартную библиотеку и запускается против
+уже работающего сервера:
+
+    python load_test.py --base-url http://127.0.0.1:8000 --users 20
+"""
+import argparse
+import json
+import os
+import re
+import string
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib import error, parse, request
+
+COLLECTION = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    'foodgram.postman_collection.json'
+)
+
+UNIQUE_VARIABLES = (
+    'email',
+    'username',
+    'secondUserEmail',
+    'secondUserUsername',
+    'thirdUserEmail',
+    'thirdUserUsername',
+)
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+TIMEOUT = 30
+
+VARIABLE = re.compile(r'{{(\w+)}}')
+
+SET_VARIABLE = re.compile(
+    r'collectionVariables\.set\(\s*[\'"](\w+)[\'"]\s*,\s*(.+)\)\s*;?\s*$'
+)
+
+GET_FIELD = re.compile(
+    r'const (\w+) = _\.get\(responseData, [\'"]([\w.]+)[\'"]\)'
+)
+
+RESPONSE_PATH = re.compile(
+    r'^responseData((?:\[\d+\]|\.\w+)*?)(?:\.slice\((\d+),\s*(\d+)\))?$'
+)
+
+PATH_PART = re.compile(r'\[(\d+)\]|\.(\w+)')
+
+EXPECTED_STATUS = re.compile(r'to\.be\.eql\(\s*"([A-Za-z ]+)"\s*\)')
+
+STATUS_BY_PHRASE = {status.phrase: status.value for status in HTTPStatus}
+
+
+class Step:
+    """Запрос коллекции с правилами извлечения переменных."""
+
+    def __init__(self, item, folder, auth):
+        """Разбор запроса коллекции."""
+        data = item['request']
+        self.name = item['name']
+        self.folder = folder
+        self.method = data['method']
+        url = data['url']
+        self.url = url['raw'] if isinstance(url, dict) else url
+        self.body = data.get('body', {}).get('raw')
+        self.headers = {
+            header['key']: header['value']
+            for header in data.get('header', [])
+            if not header.get('disabled')
+        }
+        if self.body is not None:
+            self.headers.setdefault('Content-Type', 'application/json')
+        auth = data.get('auth', auth)
+        if auth and auth.get('type') == 'apikey':
+            apikey = {entry['key']: entry['value'] for entry in auth['apikey']}
+            self.headers[apikey['key']] = apikey['value']
+        script = '\n'.join(
+            line
+            for event in item.get('event', [])
+            if event['listen'] == 'test'
+            for line in event['script']['exec']
+        )
+        expected = EXPECTED_STATUS.search(script)
+        self.expected_status = (
+            STATUS_BY_PHRASE.get(expected.group(1)) if expected else None
+        )
+        self.extract = self.parse_extract(script)
+
+    @staticmethod
+    def parse_extract(script):
+        """Правила извлечения переменных из тестового скрипта."""
+        fields = {name: field for name, field in GET_FIELD.findall(script)}
+        extract = {}
+        for line in script.splitlines():
+            match = SET_VARIABLE.search(line)
+            if not match:
+                continue
+            variable, expression = match.group(1), match.group(2).strip()
+            if expression in fields:
+                extract[variable] = (
+                    tuple(fields[expression].split('.')), None
+                )
+                continue
+            path = RESPONSE_PATH.match(expression)
+            if path:
+                parts = tuple(
+                    int(index) if index else key
+                    for index, key in PATH_PART.findall(path.group(1))
+                )
+                sliced = (
+                    (int(path.group(2)), int(path.group(3)))
+                    if path.group(2) else None
+                )
+                extract[variable] = (parts, sliced)
+        return extract
+
+    def render(self, template, variables):
+        """Подстановка переменных коллекции."""
+        return VARIABLE.sub(
+            lambda match: str(variables.get(match.group(1), match.group(0))),
+            template
+        )
+
+    def run(self, variables):
+        """Выполнение запроса, возвращает статус и время в мс."""
+        body = self.body
+        if body is not None:
+            body = self.render(body, variables).encode()
+        http_request = request.Request(
+            parse.quote(
+                self.render(self.url, variables), safe=string.punctuation
+            ),
+            data=body,
+            method=self.method,
+            headers={
+                key: self.render(value, variables)
+                for key, value in self.headers.items()
+            }
+        )
+        start = time.perf_counter()
+        try:
+            with request.urlopen(http_request, timeout=TIMEOUT) as response:
+                status, content = response.status, response.read()
+        except error.HTTPError as http_error:
+            status, content = http_error.code, http_error.read()
+        except (error.URLError, OSError):
+            status, content = None, b''
+        elapsed = (time.perf_counter() - start) * 1000
+        if self.extract and status and status < 400:
+            self.save_variables(content, variables)
+        return status, elapsed
+
+    def save_variables(self, content, variables):
+        """Сохранение переменных из ответа."""
+        try:
+            value = json.loads(content)
+        except ValueError:
+            return
+        for variable, (path, sliced) in self.extract.items():
+            result = value
+            try:
+                for part in path:
+                    result = result[part]
+            except (KeyError, IndexError, TypeError):
+                continue
+            if sliced:
+                result = result[sliced[0]:sliced[1]]
+            variables[variable] = result
+
+    def is_error(self, status):
+        """Проверка ответа на соответствие ожиданию коллекции."""
+        if status is None:
+            return True
+        if self.expected_status is not None:
+            return status != self.expected_status
+        return status >= HTTPStatus.INTERNAL_SERVER_ERROR
+
+
+class Stats:
+    """Потокобезопасный сбор статистики по имени запроса."""
+
+    def __init__(self):
+        """Пустая статистика."""
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def add(self, name, status, elapsed, is_error):
+        """Учёт одного ответа."""
+        with self.lock:
+            self.timings[name].append(elapsed)
+            self.errors[name] += is_error
+            self.statuses[name][status] += 1
+
+
+def load_steps(path, folders):
+    """Чтение запросов коллекции в порядке выполнения."""
+    with open(path, 'r', encoding='utf-8') as file:
+        collection = json.load(file)
+    steps = []
+
+    def walk(items, folder, auth):
+        for item in items:
+            if 'item' in item:
+                walk(
+                    item['item'],
+                    folder or item['name'].split(' //')[0],
+                    item.get('auth', auth)
+                )
+            else:
+                steps.append(Step(item, folder, auth))
+
+    walk(collection['item'], None, collection.get('auth'))
+    variables = {
+        variable['key']: variable['value']
+        for variable in collection.get('variable', [])
+    }
+    if folders:
+        steps = [step for step in steps if step.folder in folders]
+    return steps, variables
+
+
+def unique_variables(variables, suffix):
+    """Уникальные email/username для виртуального пользователя."""
+    unique = {}
+    for key in UNIQUE_VARIABLES:
+        value = variables.get(key)
+        if value is None:
+            continue
+        quoted = value.startswith('"') and value.endswith('"')
+        raw = value.strip('"')
+        if '@' in raw:
+            local, domain = raw.split('@', 1)
+            raw = f'{local}.{suffix}@{domain}'
+        else:
+            raw = f'{raw}-{suffix}'
+        unique[key] = f'"{raw}"' if quoted else raw
+    return unique
+
+
+def virtual_user(number, steps, variables, iterations, stats, run_id):
+    """Прохождение сценария одним виртуальным пользователем."""
+    for iteration in range(iterations):
+        scope = {
+            **variables,
+            **unique_variables(variables, f'{run_id}{number}x{iteration}')
+        }
+        for step in steps:
+            status, elapsed = step.run(scope)
+            stats.add(step.name, status, elapsed, step.is_error(status))
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    return values[max(0, round(percent / 100 * len(values)) - 1)]
+
+
+def histogram(values):
+    """Гистограмма времени ответа по корзинам BUCKETS_MS."""
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    for value in values:
+        for index, bound in enumerate(BUCKETS_MS):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f'<={bound}' for bound in BUCKETS_MS] + [f'>{BUCKETS_MS[-1]}']
+    return ' '.join(
+        f'{label}:{count}' for label, count in zip(labels, counts) if count
+    )
+
+
+def report(stats, duration, show_histogram):
+    """Вывод итогов нагрузочного прогона."""
+    total = sum(len(values) for values in stats.timings.values())
+    errors = sum(stats.errors.values())
+    print(
+        f'Запросов: {total}, ошибок: {errors} '
+        f'({errors / total * 100 if total else 0:.1f}%), '
+        f'{duration:.1f} с, {total / duration:.1f} запр/с'
+    )
+    print(
+        f'{"запрос":<60} {"кол-во":>7} {"запр/с":>7} {"ошиб%":>6} '
+        f'{"p50":>8} {"p95":>8} {"p99":>8} {"max":>8}'
+    )
+    for name, values in stats.timings.items():
+        values = sorted(values)
+        print(
+            f'{name[:60]:<60} {len(values):>7} '
+            f'{len(values) / duration:>7.1f} '
+            f'{stats.errors[name] / len(values) * 100:>6.1f} '
+            f'{percentile(values, 50):>8.1f} {percentile(values, 95):>8.1f} '
+            f'{percentile(values, 99):>8.1f} {values[-1]:>8.1f}'
+        )
+        if show_histogram:
+            statuses = ', '.join(
+                f'{status}:{count}'
+                for status, count in sorted(
+                    stats.statuses[name].items(), key=lambda item: str(item)
+                )
+            )
+            print(f'    мс {histogram(values)}; статусы {statuses}')
+
+
+def main():
+    """Точка входа."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--collection', default=COLLECTION)
+    parser.add_argument('--base-url', help='Адрес сервера вместо baseUrl.')
+    parser.add_argument(
+        '--users', type=int, default=10,
+        help='Количество одновременных виртуальных пользователей.'
+    )
+    parser.add_argument(
+        '--iterations', type=int, default=1,
+        help='Сколько раз каждый пользователь проходит сценарий.'
+    )
+    parser.add_argument(
+        '--folders', nargs='*',
+        help='Верхнеуровневые папки коллекции, например users recipes.'
+    )
+    parser.add_argument(
+        '--histogram', action='store_true',
+        help='Выводить гистограмму времени ответа и статусы.'
+    )
+    args = parser.parse_args()
+    steps, variables = load_steps(args.collection, args.folders)
+    if not steps:
+        parser.error('В коллекции нет запросов для выбранных папок')
+    if args.base_url:
+        variables['baseUrl'] = args.base_url.rstrip('/')
+    stats = Stats()
+    run_id = uuid.uuid4().hex[:6]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        futures = [
+            executor.submit(
+                virtual_user, number, steps, variables,
+                args.iterations, stats, run_id
+            )
+            for number in range(args.users)
+        ]
+        for future in futures:
+            future.result()
+    report(stats, time.perf_counter() - start, args.histogram)
+
+
+if __name__ == '__main__':
+    main()